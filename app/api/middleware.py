@@ -0,0 +1,60 @@
+"""ASGI middleware for the inference server."""
+from fastapi import HTTPException, status
+from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class RequestSizeLimitMiddleware:
+    """
+    Reject request bodies larger than a limit.
+
+    Requests that declare an oversized Content-Length are answered with 413
+    before the body is read; bodies without one (chunked uploads) are counted
+    as they are received. Written as plain ASGI rather than with
+    ``@app.middleware("http")``: ``BaseHTTPMiddleware`` does not pass the
+    client's ``http.disconnect`` through to the route, which would keep
+    disconnect-driven cancellation from ever firing.
+    """
+
+    def __init__(self, app: ASGIApp, max_bytes: int):
+        """
+        Initialize middleware.
+
+        Args:
+            app: Wrapped ASGI application
+            max_bytes: Maximum request body size in bytes
+        """
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        detail = f"Request body exceeds {self.max_bytes} bytes"
+        for name, value in scope["headers"]:
+            if name == b"content-length" and value.isdigit() and int(value) > self.max_bytes:
+                response = JSONResponse(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    content={"detail": detail},
+                )
+                await response(scope, receive, send)
+                return
+
+        received = 0
+
+        async def receive_limited() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # FastAPI re-raises HTTPExceptions from body reading as-is
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail=detail,
+                    )
+            return message
+
+        await self.app(scope, receive_limited, send)
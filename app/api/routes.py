@@ -1,9 +1,15 @@
 """API routes for Qwen3-VL inference server."""
+import asyncio
+import contextlib
+import gzip
 import logging
 import os
-import uuid
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
-from typing import Optional
+import tempfile
+from pathlib import Path
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, UploadFile, File, Form
+from fastapi.responses import StreamingResponse
+from typing import Awaitable, List, Optional, TypeVar
 from app.schemas import (
     Grounding2DRequest,
     SpatialUnderstandingRequest,
@@ -12,6 +18,9 @@ from app.schemas import (
     DocumentParsingRequest,
     OCRRequest,
     ImageComparisonRequest,
+    ImageDescriptionBatchRequest,
+    DocumentParsingBatchRequest,
+    OCRBatchRequest,
     InferenceResponse,
     HealthResponse,
 )
@@ -22,13 +31,39 @@ from app.services.description_service import ImageDescriptionService
 from app.services.document_service import DocumentParsingService
 from app.services.ocr_service import OCRService
 from app.services.comparison_service import ImageComparisonService
+from app.config import settings
+from app.core.admission import ServerOverloadedError
 from app.core.inference_engine import Qwen3VLInferenceEngine
-from app.core.utils import encode_video_to_base64
+from app.core.utils import copy_file_object
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 router = APIRouter()
 
+# Buffer size for streaming uploaded files to disk
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+# Media type for streamed (Server-Sent Events) responses
+SSE_MEDIA_TYPE = "text/event-stream"
+
+# OpenAPI schema for routes that return a pre-serialized InferenceResponse
+INFERENCE_RESPONSES = {200: {"model": InferenceResponse}}
+BATCH_INFERENCE_RESPONSES = {200: {"model": List[InferenceResponse]}}
+
+# How often (seconds) to check whether the client of a running request is still connected
+DISCONNECT_POLL_INTERVAL = 0.1
+
+# Non-standard status logged for requests whose client went away (nginx convention)
+CLIENT_CLOSED_REQUEST = 499
+
+# Batch responses at least this large are gzip-compressed when the client accepts it
+GZIP_MIN_SIZE = 1024
+
+# Directory for uploaded files (created once at startup)
+UPLOAD_DIR = Path(settings.upload_dir)
+
 # Global engine instance (will be initialized on startup)
 _engine: Qwen3VLInferenceEngine = None
 
@@ -49,6 +84,81 @@ def set_engine(engine: Qwen3VLInferenceEngine):
     _engine = engine
 
 
+async def cancel_on_disconnect(http_request: Request, awaitable: Awaitable[T]) -> Optional[T]:
+    """
+    Await a service call, cancelling it if the client disconnects first.
+
+    Cancellation reaches the engine, which aborts the vLLM request so its
+    remaining tokens and KV cache blocks go to live requests.
+
+    Args:
+        http_request: Incoming HTTP request
+        awaitable: Service call to run
+
+    Returns:
+        Result of the call, or None if the client disconnected
+    """
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_INTERVAL)
+            if done:
+                return task.result()
+            if await http_request.is_disconnected():
+                logger.info("Client disconnected, cancelling %s", http_request.url.path)
+                task.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await task
+                return None
+    finally:
+        task.cancel()
+
+
+async def gather_or_cancel(*awaitables: Awaitable[T]) -> List[T]:
+    """
+    Run awaitables concurrently, cancelling the rest as soon as one raises.
+
+    Unlike a bare ``asyncio.gather``, a failing batch item (e.g. rejected by
+    admission control) does not leave its siblings generating for a response
+    that will never be sent.
+
+    Args:
+        *awaitables: Service calls to run
+
+    Returns:
+        Results in argument order
+    """
+    tasks = [asyncio.ensure_future(awaitable) for awaitable in awaitables]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+def to_json_response(response: Optional[InferenceResponse]) -> Response:
+    """Serialize a service response directly, skipping response model re-validation."""
+    if response is None:
+        return Response(status_code=CLIENT_CLOSED_REQUEST)
+    return Response(content=orjson.dumps(response.model_dump()), media_type="application/json")
+
+
+def to_batch_json_response(responses: Optional[List[InferenceResponse]], http_request: Request) -> Response:
+    """Serialize batch results, gzip-compressing large bodies if the client accepts gzip."""
+    if responses is None:
+        return Response(status_code=CLIENT_CLOSED_REQUEST)
+    body = orjson.dumps([response.model_dump() for response in responses])
+    if len(body) >= GZIP_MIN_SIZE and "gzip" in http_request.headers.get("accept-encoding", ""):
+        return Response(
+            content=gzip.compress(body, compresslevel=5),
+            media_type="application/json",
+            headers={"Content-Encoding": "gzip", "Vary": "Accept-Encoding"},
+        )
+    return Response(content=body, media_type="application/json")
+
+
 @router.get("/health", response_model=HealthResponse)
 async def health_check():
     """Health check endpoint."""
@@ -67,9 +177,10 @@ async def health_check():
         )
 
 
-@router.post("/v1/grounding/2d", response_model=InferenceResponse)
+@router.post("/v1/grounding/2d", response_model=None, responses=INFERENCE_RESPONSES)
 async def grounding_2d(
     request: Grounding2DRequest,
+    http_request: Request,
     engine: Qwen3VLInferenceEngine = Depends(get_engine),
 ):
     """
@@ -79,12 +190,14 @@ async def grounding_2d(
     in relative coordinates (0-1000).
     """
     service = GroundingService(engine)
-    return await service.perform_grounding(request)
+    response = await cancel_on_disconnect(http_request, service.perform_grounding(request))
+    return to_json_response(response)
 
 
-@router.post("/v1/spatial/understanding", response_model=InferenceResponse)
+@router.post("/v1/spatial/understanding", response_model=None, responses=INFERENCE_RESPONSES)
 async def spatial_understanding(
     request: SpatialUnderstandingRequest,
+    http_request: Request,
     engine: Qwen3VLInferenceEngine = Depends(get_engine),
 ):
     """
@@ -94,12 +207,14 @@ async def spatial_understanding(
     positions, and affordances.
     """
     service = SpatialUnderstandingService(engine)
-    return await service.perform_spatial_understanding(request)
+    response = await cancel_on_disconnect(http_request, service.perform_spatial_understanding(request))
+    return to_json_response(response)
 
 
-@router.post("/v1/video/understanding", response_model=InferenceResponse)
+@router.post("/v1/video/understanding", response_model=None, responses=INFERENCE_RESPONSES)
 async def video_understanding(
     request: VideoUnderstandingRequest,
+    http_request: Request,
     engine: Qwen3VLInferenceEngine = Depends(get_engine),
 ):
     """
@@ -115,18 +230,20 @@ async def video_understanding(
     - frame_base64_list: List of base64 encoded frames
     """
     service = VideoUnderstandingService(engine)
-    return await service.perform_video_understanding(request)
+    response = await cancel_on_disconnect(http_request, service.perform_video_understanding(request))
+    return to_json_response(response)
 
 
-@router.post("/v1/video/understanding/upload", response_model=InferenceResponse)
+@router.post("/v1/video/understanding/upload", response_model=None, responses=INFERENCE_RESPONSES)
 async def video_understanding_upload(
+    http_request: Request,
     file: UploadFile = File(..., description="Video file to analyze"),
     prompt: str = Form(..., description="Question or instruction about the video"),
-    max_tokens: Optional[int] = Form(2048, description="Maximum tokens to generate"),
-    temperature: Optional[float] = Form(0.0, description="Sampling temperature"),
-    top_p: Optional[float] = Form(1.0, description="Top-p sampling"),
-    max_frames: Optional[int] = Form(2048, description="Maximum frames to process"),
-    sample_fps: Optional[float] = Form(2.0, description="Sampling FPS"),
+    max_tokens: int = Form(2048, description="Maximum tokens to generate"),
+    temperature: float = Form(0.0, description="Sampling temperature"),
+    top_p: float = Form(1.0, gt=0.0, le=1.0, description="Top-p sampling"),
+    max_frames: int = Form(2048, description="Maximum frames to process"),
+    sample_fps: float = Form(2.0, description="Sampling FPS"),
     engine: Qwen3VLInferenceEngine = Depends(get_engine),
 ):
     """
@@ -142,25 +259,34 @@ async def video_understanding_upload(
       -F "prompt=Describe what happens in this video"
     ```
     """
-    try:
-        # Save uploaded file to temporary location
-        temp_dir = "/tmp/qwen_vl_uploads"
-        os.makedirs(temp_dir, exist_ok=True)
-
-        temp_file_path = os.path.join(temp_dir, f"{uuid.uuid4().hex}_{file.filename}")
-
-        with open(temp_file_path, "wb") as f:
-            content = await file.read()
-            f.write(content)
-
-        logger.info(f"Video uploaded and saved to {temp_file_path}")
-
-        # Convert to base64 for processing
-        video_base64 = encode_video_to_base64(temp_file_path)
+    if file.size is not None and file.size > settings.max_upload_bytes:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Uploaded file exceeds {settings.max_upload_bytes} bytes",
+        )
 
-        # Create request object
+    temp_file_path = None
+    try:
+        # Stream uploaded file to temporary location in fixed-size chunks
+        with tempfile.NamedTemporaryFile(
+            dir=UPLOAD_DIR,
+            suffix=f"_{os.path.basename(file.filename or 'video')}",
+            delete=False,
+        ) as f:
+            temp_file_path = f.name
+            await asyncio.to_thread(copy_file_object, file.file, f, UPLOAD_CHUNK_SIZE)
+            written = f.tell()
+
+        if written > settings.max_upload_bytes:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Uploaded file exceeds {settings.max_upload_bytes} bytes",
+            )
+
+        logger.info("Video uploaded and saved to %s", temp_file_path)
+
+        # Create request object; the saved file is passed to the service separately
         request = VideoUnderstandingRequest(
-            video_base64=video_base64,
             prompt=prompt,
             max_tokens=max_tokens,
             temperature=temperature,
@@ -171,87 +297,114 @@ async def video_understanding_upload(
 
         # Process video
         service = VideoUnderstandingService(engine)
-        result = await service.perform_video_understanding(request)
-
-        # Clean up temporary file
-        try:
-            os.remove(temp_file_path)
-        except Exception as e:
-            logger.warning(f"Failed to remove temporary file {temp_file_path}: {e}")
-
-        return result
+        response = await cancel_on_disconnect(
+            http_request, service.perform_video_understanding(request, video_path=temp_file_path)
+        )
+        return to_json_response(response)
 
+    except (HTTPException, ServerOverloadedError):
+        raise
     except Exception as e:
-        logger.error(f"Video upload processing failed: {e}")
+        logger.error("Video upload processing failed: %s", e, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to process uploaded video: {str(e)}"
         )
+    finally:
+        # Clean up temporary file
+        if temp_file_path is not None:
+            try:
+                os.remove(temp_file_path)
+            except Exception as e:
+                logger.warning("Failed to remove temporary file %s: %s", temp_file_path, e)
 
 
-@router.post("/v1/image/description", response_model=InferenceResponse)
+@router.post("/v1/image/description", response_model=None, responses=INFERENCE_RESPONSES)
 async def image_description(
     request: ImageDescriptionRequest,
+    http_request: Request,
     engine: Qwen3VLInferenceEngine = Depends(get_engine),
 ):
     """
     Generate detailed image descriptions.
 
     This endpoint provides comprehensive descriptions of images with varying
-    levels of detail.
+    levels of detail. Set ``stream`` to receive the description as Server-Sent Events.
     """
     service = ImageDescriptionService(engine)
-    return await service.perform_image_description(request)
+    if request.stream:
+        engine.check_admission()
+        return StreamingResponse(service.stream_image_description(request), media_type=SSE_MEDIA_TYPE)
+    response = await cancel_on_disconnect(http_request, service.perform_image_description(request))
+    return to_json_response(response)
 
 
-@router.post("/v1/document/parsing", response_model=InferenceResponse)
+@router.post("/v1/document/parsing", response_model=None, responses=INFERENCE_RESPONSES)
 async def document_parsing(
     request: DocumentParsingRequest,
+    http_request: Request,
     engine: Qwen3VLInferenceEngine = Depends(get_engine),
 ):
     """
     Parse documents and extract structured content.
 
     This endpoint converts document images to various formats (HTML, Markdown, JSON)
-    with optional positional information.
+    with optional positional information. Set ``stream`` to receive the output as
+    Server-Sent Events.
     """
     service = DocumentParsingService(engine)
-    return await service.perform_document_parsing(request)
+    if request.stream:
+        engine.check_admission()
+        return StreamingResponse(service.stream_document_parsing(request), media_type=SSE_MEDIA_TYPE)
+    response = await cancel_on_disconnect(http_request, service.perform_document_parsing(request))
+    return to_json_response(response)
 
 
-@router.post("/v1/ocr/document", response_model=InferenceResponse)
+@router.post("/v1/ocr/document", response_model=None, responses=INFERENCE_RESPONSES)
 async def document_ocr(
     request: OCRRequest,
+    http_request: Request,
     engine: Qwen3VLInferenceEngine = Depends(get_engine),
 ):
     """
     Perform OCR on document images.
 
     This endpoint extracts text from structured documents with optional
-    bounding box information.
+    bounding box information. Set ``stream`` to receive the text as Server-Sent Events.
     """
     service = OCRService(engine)
-    return await service.perform_document_ocr(request)
+    if request.stream:
+        engine.check_admission()
+        return StreamingResponse(service.stream_ocr(request, is_wild=False), media_type=SSE_MEDIA_TYPE)
+    response = await cancel_on_disconnect(http_request, service.perform_document_ocr(request))
+    return to_json_response(response)
 
 
-@router.post("/v1/ocr/wild", response_model=InferenceResponse)
+@router.post("/v1/ocr/wild", response_model=None, responses=INFERENCE_RESPONSES)
 async def wild_ocr(
     request: OCRRequest,
+    http_request: Request,
     engine: Qwen3VLInferenceEngine = Depends(get_engine),
 ):
     """
     Perform OCR on natural/wild images.
 
     This endpoint extracts text from images in natural scenes (signs, labels, etc.)
-    with optional bounding box information.
+    with optional bounding box information. Set ``stream`` to receive the text as
+    Server-Sent Events.
     """
     service = OCRService(engine)
-    return await service.perform_wild_ocr(request)
+    if request.stream:
+        engine.check_admission()
+        return StreamingResponse(service.stream_ocr(request, is_wild=True), media_type=SSE_MEDIA_TYPE)
+    response = await cancel_on_disconnect(http_request, service.perform_wild_ocr(request))
+    return to_json_response(response)
 
 
-@router.post("/v1/image/comparison", response_model=InferenceResponse)
+@router.post("/v1/image/comparison", response_model=None, responses=INFERENCE_RESPONSES)
 async def image_comparison(
     request: ImageComparisonRequest,
+    http_request: Request,
     engine: Qwen3VLInferenceEngine = Depends(get_engine),
 ):
     """
@@ -269,4 +422,81 @@ async def image_comparison(
     Returns a detailed comparison analysis in JSON or text format.
     """
     service = ImageComparisonService(engine)
-    return await service.perform_comparison(request)
+    response = await cancel_on_disconnect(http_request, service.perform_comparison(request))
+    return to_json_response(response)
+
+
+@router.post("/v1/image/description/batch", response_model=None, responses=BATCH_INFERENCE_RESPONSES)
+async def image_description_batch(
+    batch: ImageDescriptionBatchRequest,
+    http_request: Request,
+    engine: Qwen3VLInferenceEngine = Depends(get_engine),
+):
+    """
+    Generate descriptions for several images in one call.
+
+    Requests are submitted to the engine concurrently and batched there;
+    results are returned in request order. ``stream`` is ignored.
+    """
+    service = ImageDescriptionService(engine)
+    responses = await cancel_on_disconnect(http_request, gather_or_cancel(
+        *(service.perform_image_description(request) for request in batch.requests)
+    ))
+    return to_batch_json_response(responses, http_request)
+
+
+@router.post("/v1/document/parsing/batch", response_model=None, responses=BATCH_INFERENCE_RESPONSES)
+async def document_parsing_batch(
+    batch: DocumentParsingBatchRequest,
+    http_request: Request,
+    engine: Qwen3VLInferenceEngine = Depends(get_engine),
+):
+    """
+    Parse several documents in one call.
+
+    Requests are submitted to the engine concurrently and batched there;
+    results are returned in request order. ``stream`` is ignored.
+    """
+    service = DocumentParsingService(engine)
+    responses = await cancel_on_disconnect(http_request, gather_or_cancel(
+        *(service.perform_document_parsing(request) for request in batch.requests)
+    ))
+    return to_batch_json_response(responses, http_request)
+
+
+@router.post("/v1/ocr/document/batch", response_model=None, responses=BATCH_INFERENCE_RESPONSES)
+async def document_ocr_batch(
+    batch: OCRBatchRequest,
+    http_request: Request,
+    engine: Qwen3VLInferenceEngine = Depends(get_engine),
+):
+    """
+    Perform OCR on several document images in one call.
+
+    Requests are submitted to the engine concurrently and batched there;
+    results are returned in request order. ``stream`` is ignored.
+    """
+    service = OCRService(engine)
+    responses = await cancel_on_disconnect(http_request, gather_or_cancel(
+        *(service.perform_document_ocr(request) for request in batch.requests)
+    ))
+    return to_batch_json_response(responses, http_request)
+
+
+@router.post("/v1/ocr/wild/batch", response_model=None, responses=BATCH_INFERENCE_RESPONSES)
+async def wild_ocr_batch(
+    batch: OCRBatchRequest,
+    http_request: Request,
+    engine: Qwen3VLInferenceEngine = Depends(get_engine),
+):
+    """
+    Perform OCR on several natural/wild images in one call.
+
+    Requests are submitted to the engine concurrently and batched there;
+    results are returned in request order. ``stream`` is ignored.
+    """
+    service = OCRService(engine)
+    responses = await cancel_on_disconnect(http_request, gather_or_cancel(
+        *(service.perform_wild_ocr(request) for request in batch.requests)
+    ))
+    return to_batch_json_response(responses, http_request)
@@ -26,20 +26,63 @@ class Settings(BaseSettings):
     max_model_len: Optional[int] = None
     trust_remote_code: bool = True
     enforce_eager: bool = False
+    max_num_seqs: Optional[int] = None
+    max_num_batched_tokens: Optional[int] = None
+    # Max prompt tokens a long prefill (e.g. a long video) may take per scheduler step (0 = no limit)
+    long_prefill_token_threshold: int = 0
+    # Reuse KV blocks (and skip the vision encoder) for repeated image + prompt prefixes
+    enable_prefix_caching: bool = True
+    # Size of vLLM's cache of preprocessed multimodal inputs, keyed by image content hash
+    mm_processor_cache_gb: float = 4.0
+    # "data" runs the vision encoder batch data-parallel across TP ranks instead of sharding its weights
+    mm_encoder_tp_mode: str = "weights"
+    # Weight quantization, e.g. "fp8" for online FP8 of the language model and vision tower (unset = checkpoint dtype)
+    quantization: Optional[str] = None
+    # KV cache dtype; "fp8" halves KV cache memory, which long videos fill with vision tokens
+    kv_cache_dtype: str = "auto"
+    # Fraction of temporally redundant video tokens dropped after the vision encoder (unset disables)
+    video_pruning_rate: Optional[float] = None
+    # vLLM torch.compile / CUDA graph options, e.g. {"compile_mm_encoder": true, "cudagraph_capture_sizes": [1, 2, 4, 8, 16]}
+    compilation_config: dict = {}
+    # Image pixel budgets warmed up at startup (the services' min/max defaults); empty disables
+    warmup_pixel_budgets: list[int] = [64 * 32 * 32, 512 * 32 * 32, 2048 * 32 * 32, 4608 * 32 * 32]
+    # Reject requests whose estimated queueing delay exceeds this many seconds (unset disables)
+    admission_max_wait_s: Optional[float] = None
 
     # Inference settings
     default_max_tokens: int = 2048
     default_temperature: float = 0.0
     default_top_p: float = 1.0
+    inputs_cache_size: int = 64
+    # Threads for chat templating and image/video preprocessing (unset = min(32, CPUs + 4))
+    preprocess_workers: Optional[int] = None
+    result_cache_size: int = 1024
 
     # Image processing settings
     default_min_pixels: int = 64 * 32 * 32
     default_max_pixels: int = 2048 * 32 * 32
+    image_cache_size: int = 256
+    # Budget (bytes) of each decoded-image cache, including the engine's
+    # preprocessed inputs cache; entries over 1/8 of it are not cached
+    image_cache_max_bytes: int = 512 * 1024 * 1024
+    image_url_cache_ttl: float = 300.0
 
     # Video processing settings
     default_max_frames: int = 2048
     default_sample_fps: float = 2.0
     default_total_pixels: int = 20480 * 32 * 32
+    # Threads shared by all requests for concurrent frame/image downloads and decodes
+    frame_prefetch_workers: int = 16
+
+    # Upload settings
+    upload_dir: str = "/tmp/qwen_vl_uploads"
+    max_upload_bytes: int = 1024 * 1024 * 1024
+
+    # HTTP client settings (for downloading images/videos)
+    http_pool_connections: int = 32
+    http_pool_maxsize: int = 64
+    http_max_retries: int = 3
+    max_image_bytes: int = 64 * 1024 * 1024
 
     # CORS settings
     allow_origins: list[str] = ["*"]
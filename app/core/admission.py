@@ -0,0 +1,141 @@
+"""Admission control for the inference engine."""
+import logging
+import math
+import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ServerOverloadedError(RuntimeError):
+    """Raised when a request is rejected because the engine is saturated."""
+
+    def __init__(self, estimated_wait_s: float):
+        """
+        Initialize error.
+
+        Args:
+            estimated_wait_s: Estimated queueing delay that caused the rejection
+        """
+        super().__init__(f"Server overloaded: estimated wait {estimated_wait_s:.1f}s")
+        self.estimated_wait_s = estimated_wait_s
+
+    @property
+    def retry_after(self) -> int:
+        """Suggested client back-off in whole seconds."""
+        return max(1, math.ceil(self.estimated_wait_s))
+
+
+class AdmissionController:
+    """
+    Reject requests whose expected queueing delay exceeds a target.
+
+    Applies Little's law to the engine: the expected wait for a new request is
+    the number of tokens already admitted (in-flight ``max_tokens``) divided by
+    the engine's aggregate decode throughput.
+
+    Throughput is measured over windows of busy time (time with at least one
+    request in flight), so idle periods do not drag the estimate down. A window
+    only updates the moving average once it spans ``window_s`` seconds and
+    ``min_window_tokens`` generated tokens; short or tiny requests on their own
+    say little about batched throughput and would make the estimate far too
+    pessimistic. Until the first window completes every request is admitted.
+
+    All methods are called from the event loop thread and need no locking.
+    """
+
+    def __init__(
+        self,
+        max_wait_s: float,
+        ema_alpha: float = 0.2,
+        window_s: float = 2.0,
+        min_window_tokens: int = 256,
+    ):
+        """
+        Initialize admission controller.
+
+        Args:
+            max_wait_s: Maximum estimated wait (seconds) for admitting a request
+            ema_alpha: Smoothing factor for the throughput moving average
+            window_s: Minimum busy time (seconds) of a throughput sample
+            min_window_tokens: Minimum generated tokens of a throughput sample
+        """
+        self.max_wait_s = max_wait_s
+        self.ema_alpha = ema_alpha
+        self.window_s = window_s
+        self.min_window_tokens = min_window_tokens
+        self.queued_tokens = 0
+        self.in_flight = 0
+        self.tokens_per_s: Optional[float] = None
+        self._last_update = time.monotonic()
+        self._window_tokens = 0
+        self._window_busy_s = 0.0
+
+    def estimated_wait(self) -> float:
+        """Estimated seconds until the currently admitted tokens are generated."""
+        if not self.tokens_per_s:
+            return 0.0
+        return self.queued_tokens / self.tokens_per_s
+
+    def check(self) -> None:
+        """
+        Raise if a new request would be rejected right now, without admitting it.
+
+        Raises:
+            ServerOverloadedError: If the estimated wait exceeds ``max_wait_s``
+        """
+        if not self.in_flight:
+            return
+        estimated_wait = self.estimated_wait()
+        if estimated_wait > self.max_wait_s:
+            logger.warning(
+                "Rejecting request: estimated wait %.1fs exceeds %.1fs",
+                estimated_wait, self.max_wait_s,
+            )
+            raise ServerOverloadedError(estimated_wait)
+
+    def acquire(self, max_tokens: int) -> None:
+        """
+        Admit a request or raise if the engine is saturated.
+
+        Args:
+            max_tokens: Token budget of the request
+
+        Raises:
+            ServerOverloadedError: If the estimated wait exceeds ``max_wait_s``
+        """
+        self.check()
+        if not self.in_flight:
+            # Engine was idle: busy time starts now
+            self._last_update = time.monotonic()
+
+        self.in_flight += 1
+        self.queued_tokens += max_tokens
+
+    def release(self, max_tokens: int, generated_tokens: int) -> None:
+        """
+        Mark an admitted request as finished and update the throughput estimate.
+
+        Args:
+            max_tokens: Token budget passed to ``acquire``
+            generated_tokens: Number of tokens the request actually generated
+        """
+        now = time.monotonic()
+        self._window_busy_s += now - self._last_update
+        self._window_tokens += max(generated_tokens, 0)
+        self._last_update = now
+
+        self.in_flight -= 1
+        self.queued_tokens -= max_tokens
+
+        if self._window_busy_s < self.window_s:
+            return
+        if self._window_tokens >= self.min_window_tokens:
+            rate = self._window_tokens / self._window_busy_s
+            if self.tokens_per_s is None:
+                self.tokens_per_s = rate
+            else:
+                self.tokens_per_s += self.ema_alpha * (rate - self.tokens_per_s)
+        # Windows with too few tokens (e.g. prefill-bound requests) are dropped
+        self._window_tokens = 0
+        self._window_busy_s = 0.0
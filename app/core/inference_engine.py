@@ -1,15 +1,69 @@
 """vLLM-based inference engine for Qwen3-VL model."""
+import asyncio
+import functools
+import math
 import os
 import logging
-from typing import Optional, Union, List, Dict, Any
-import torch
-from vllm import LLM, SamplingParams
-from transformers import AutoProcessor
-from qwen_vl_utils import process_vision_info
+import uuid
+from typing import TYPE_CHECKING, Optional, Union, List, Dict, Any, AsyncIterator, Tuple
+
+# Must be set before vLLM is imported so worker processes never fork with CUDA initialized
+os.environ.setdefault('VLLM_WORKER_MULTIPROC_METHOD', 'spawn')
+
+from app.core.admission import AdmissionController
+from app.core.utils import (
+    LRUCache,
+    image_fingerprint,
+    image_nbytes,
+    load_message_images,
+    messages_fingerprint,
+    video_fingerprint,
+)
+
+if TYPE_CHECKING:
+    # Heavy ML dependencies are imported lazily when the engine is created,
+    # so API-only processes and tooling can import this module cheaply
+    from transformers import AutoProcessor
+    from vllm import AsyncLLMEngine, SamplingParams
 
 logger = logging.getLogger(__name__)
 
 
+def _inputs_nbytes(inputs: Dict[str, Any]) -> int:
+    """Approximate memory held by the decoded images and video frames of prepared inputs."""
+    mm_data = inputs['multi_modal_data']
+    size = sum(image_nbytes(image) for image in mm_data.get('image', ()))
+    for video in mm_data.get('video', ()):
+        if isinstance(video, tuple):
+            # (frames, metadata) pairs from return_video_metadata=True
+            video = video[0]
+        if isinstance(video, list):
+            size += sum(image_nbytes(frame) for frame in video)
+        else:
+            size += video.element_size() * video.nelement()
+    return size
+
+
+def _chat_template_key(messages: List[Dict[str, Any]]) -> Tuple:
+    """
+    Canonicalize messages into a hashable key for chat template caching.
+
+    Image and video items render to the same placeholder tokens regardless of
+    their source, so only their type is kept; text parts are kept verbatim.
+    """
+    key = []
+    for message in messages:
+        content = message["content"]
+        if isinstance(content, str):
+            key.append((message["role"], content))
+        else:
+            key.append((
+                message["role"],
+                tuple((item["type"], item.get("text")) for item in content),
+            ))
+    return tuple(key)
+
+
 class Qwen3VLInferenceEngine:
     """vLLM-based inference engine for Qwen3-VL."""
 
@@ -21,6 +75,19 @@ class Qwen3VLInferenceEngine:
         trust_remote_code: bool = True,
         enforce_eager: bool = False,
         max_model_len: Optional[int] = None,
+        inputs_cache_size: int = 64,
+        inputs_cache_max_bytes: Optional[int] = None,
+        max_num_seqs: Optional[int] = None,
+        max_num_batched_tokens: Optional[int] = None,
+        long_prefill_token_threshold: int = 0,
+        enable_prefix_caching: bool = True,
+        mm_processor_cache_gb: float = 4.0,
+        mm_encoder_tp_mode: str = "weights",
+        quantization: Optional[str] = None,
+        kv_cache_dtype: str = "auto",
+        video_pruning_rate: Optional[float] = None,
+        compilation_config: Optional[Dict[str, Any]] = None,
+        admission: Optional[AdmissionController] = None,
     ):
         """
         Initialize the inference engine.
@@ -32,25 +99,53 @@ class Qwen3VLInferenceEngine:
             trust_remote_code: Whether to trust remote code
             enforce_eager: Whether to enforce eager execution
             max_model_len: Maximum model length
+            inputs_cache_size: Number of preprocessed inputs to keep cached
+            inputs_cache_max_bytes: Memory budget of the preprocessed inputs cache
+                (None for no limit)
+            max_num_seqs: Maximum number of requests batched per scheduler step
+            max_num_batched_tokens: Maximum number of tokens batched per scheduler step
+            long_prefill_token_threshold: Per-step token cap for long prefills (0 disables)
+            enable_prefix_caching: Whether to reuse KV cache blocks across requests
+            mm_processor_cache_gb: Size of the multimodal processor cache in GiB
+            mm_encoder_tp_mode: Vision encoder parallelism, "weights" or "data"
+            quantization: Weight quantization method (None uses the checkpoint dtype)
+            kv_cache_dtype: KV cache data type
+            video_pruning_rate: Fraction of redundant video tokens to prune (None disables)
+            compilation_config: vLLM compilation options (ignored with enforce_eager)
+            admission: Optional admission controller consulted before each request
         """
         self.model_path = model_path
-        self.model: Optional[LLM] = None
-        self.processor: Optional[AutoProcessor] = None
+        self.model: Optional["AsyncLLMEngine"] = None
+        self.processor: Optional["AutoProcessor"] = None
+        self.admission = admission
+        self._inputs_cache = LRUCache(
+            maxsize=inputs_cache_size,
+            max_bytes=inputs_cache_max_bytes,
+            sizeof=_inputs_nbytes,
+        )
+        self._render_chat_template = functools.lru_cache(maxsize=1024)(
+            self._render_chat_template_uncached
+        )
 
-        # Set environment variable for vLLM
-        os.environ['VLLM_WORKER_MULTIPROC_METHOD'] = 'spawn'
+        import torch
+        from transformers import AutoProcessor
+        from vllm import AsyncEngineArgs, AsyncLLMEngine
 
         # Determine tensor parallel size
         if tensor_parallel_size is None:
             tensor_parallel_size = torch.cuda.device_count() if torch.cuda.is_available() else 1
 
-        logger.info(f"Initializing Qwen3-VL Inference Engine with model: {model_path}")
-        logger.info(f"Tensor parallel size: {tensor_parallel_size}")
-        logger.info(f"GPU memory utilization: {gpu_memory_utilization}")
+        logger.info("Initializing Qwen3-VL Inference Engine with model: %s", model_path)
+        logger.info("Tensor parallel size: %s", tensor_parallel_size)
+        logger.info("GPU memory utilization: %s", gpu_memory_utilization)
+
+        if quantization == "fp8" and torch.cuda.is_available() and torch.cuda.get_device_capability() < (8, 9):
+            # vLLM falls back to weight-only FP8 (Marlin) kernels without FP8 tensor cores
+            logger.warning("GPU has no FP8 tensor cores; FP8 weights will only reduce memory traffic")
 
         try:
-            # Initialize vLLM engine
-            self.model = LLM(
+            # Initialize async vLLM engine
+            engine_args = AsyncEngineArgs(
                 model=model_path,
                 trust_remote_code=trust_remote_code,
                 gpu_memory_utilization=gpu_memory_utilization,
@@ -58,14 +153,27 @@ class Qwen3VLInferenceEngine:
                 tensor_parallel_size=tensor_parallel_size,
                 seed=0,
                 max_model_len=max_model_len,
+                max_num_seqs=max_num_seqs,
+                max_num_batched_tokens=max_num_batched_tokens,
+                long_prefill_token_threshold=long_prefill_token_threshold,
+                enable_prefix_caching=enable_prefix_caching,
+                mm_processor_cache_gb=mm_processor_cache_gb,
+                mm_encoder_tp_mode=mm_encoder_tp_mode,
+                quantization=quantization,
+                kv_cache_dtype=kv_cache_dtype,
+                video_pruning_rate=video_pruning_rate,
+                compilation_config=compilation_config or {},
             )
+            self.model = AsyncLLMEngine.from_engine_args(engine_args)
 
             # Load processor
             self.processor = AutoProcessor.from_pretrained(model_path)
+            image_processor = self.processor.image_processor
+            self.image_size_factor = image_processor.patch_size * image_processor.merge_size
 
             logger.info("Inference engine initialized successfully")
         except Exception as e:
-            logger.error(f"Failed to initialize inference engine: {e}")
+            logger.error("Failed to initialize inference engine: %s", e)
             raise
 
     def prepare_image_inputs(
@@ -81,12 +189,18 @@ class Qwen3VLInferenceEngine:
         Returns:
             Dictionary with prompt and multimodal data
         """
-        text = self.processor.apply_chat_template(
-            messages, tokenize=False, add_generation_prompt=True
-        )
+        cache_key = messages_fingerprint(messages)
+        if cache_key is not None:
+            cached = self._inputs_cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        text = self._render_chat_template(_chat_template_key(messages))
+
+        from qwen_vl_utils import process_vision_info
 
         image_inputs, video_inputs, video_kwargs = process_vision_info(
-            messages,
+            load_message_images(messages, self.image_size_factor),
             image_patch_size=self.processor.image_processor.patch_size,
             return_video_kwargs=True,
             return_video_metadata=True
@@ -98,11 +212,50 @@ class Qwen3VLInferenceEngine:
         if video_inputs is not None:
             mm_data['video'] = video_inputs
 
-        return {
+        inputs = {
             'prompt': text,
             'multi_modal_data': mm_data,
             'mm_processor_kwargs': video_kwargs
         }
+        # Content hashes let vLLM reuse cached processor outputs, encoder
+        # outputs and prefix KV blocks for repeated images and frame lists
+        # without hashing pixel data itself
+        uuids = {}
+        if image_inputs is not None:
+            uuids['image'] = [image_fingerprint(image) for image in image_inputs]
+        if video_inputs is not None:
+            video_uuids = [
+                video_fingerprint(item)
+                for message in messages
+                if isinstance(message.get('content'), list)
+                for item in message['content']
+                if item.get('type') == 'video'
+            ]
+            # Video files are left for vLLM to hash
+            uuids = {**uuids, 'video': video_uuids} if None not in video_uuids else {}
+        if uuids:
+            inputs['multi_modal_uuids'] = uuids
+        if cache_key is not None:
+            self._inputs_cache.put(cache_key, inputs)
+        return inputs
+
+    def _render_chat_template_uncached(self, key: Tuple) -> str:
+        """Render the chat template for a canonicalized message key."""
+        messages = []
+        for role, content in key:
+            if isinstance(content, str):
+                messages.append({"role": role, "content": content})
+                continue
+            messages.append({
+                "role": role,
+                "content": [
+                    {"type": item_type, "text": text} if item_type == "text" else {"type": item_type}
+                    for item_type, text in content
+                ],
+            })
+        return self.processor.apply_chat_template(
+            messages, tokenize=False, add_generation_prompt=True
+        )
 
     def prepare_video_inputs(
         self,
@@ -120,16 +273,21 @@ class Qwen3VLInferenceEngine:
         # Video processing uses the same preparation as image
         return self.prepare_image_inputs(messages)
 
-    def generate(
+    async def generate_async(
         self,
         messages: List[Dict[str, Any]],
         max_tokens: int = 2048,
         temperature: float = 0.0,
         top_p: float = 1.0,
         seed: Optional[int] = None,
+        use_admission: bool = True,
     ) -> str:
         """
-        Generate response from the model.
+        Generate response from the model without blocking the event loop.
+
+        Chat templating and vision preprocessing (image fetch, decode, resize)
+        run in a worker thread; the request is then scheduled on the async
+        engine, which continuously batches it with other in-flight requests.
 
         Args:
             messages: List of message dictionaries
@@ -137,49 +295,62 @@ class Qwen3VLInferenceEngine:
             temperature: Sampling temperature
             top_p: Top-p sampling parameter
             seed: Random seed
+            use_admission: Whether the request goes through the admission controller
 
         Returns:
             Generated text response
+
+        Raises:
+            ServerOverloadedError: If the admission controller rejects the request
         """
         if self.model is None or self.processor is None:
             raise RuntimeError("Model not initialized")
 
+        admission = self.admission if use_admission else None
+        if admission is not None:
+            admission.acquire(max_tokens)
+        generated_tokens = 0
+        request_id = uuid.uuid4().hex
         try:
-            # Prepare inputs
-            inputs = self.prepare_image_inputs(messages)
-
-            # Create sampling parameters
-            sampling_params = SamplingParams(
-                max_tokens=max_tokens,
-                temperature=temperature,
-                top_p=top_p,
-                seed=seed if seed is not None else 0,
+            # Prepare inputs off the event loop
+            inputs = await asyncio.to_thread(self.prepare_image_inputs, messages)
+            sampling_params = self._make_sampling_params(
+                max_tokens, temperature, top_p, seed, "final_only"
             )
 
-            # Generate
-            outputs = self.model.generate(inputs, sampling_params=sampling_params)
+            final_output = None
+            async for output in self.model.generate(
+                inputs, sampling_params, request_id=request_id
+            ):
+                final_output = output
 
             # Extract generated text
-            if outputs and len(outputs) > 0:
-                output = outputs[0]
-                if output.outputs and len(output.outputs) > 0:
-                    return output.outputs[0].text
+            if final_output is not None and final_output.outputs:
+                generated_tokens = len(final_output.outputs[0].token_ids)
+                return final_output.outputs[0].text
 
             return ""
+        except (asyncio.CancelledError, GeneratorExit):
+            # Client went away: free the request's KV cache blocks right away
+            await self._abort(request_id)
+            raise
         except Exception as e:
-            logger.error(f"Generation failed: {e}")
+            logger.error("Generation failed: %s", e)
             raise
+        finally:
+            if admission is not None:
+                admission.release(max_tokens, generated_tokens)
 
-    def generate_stream(
+    async def generate_stream(
         self,
         messages: List[Dict[str, Any]],
         max_tokens: int = 2048,
         temperature: float = 0.0,
         top_p: float = 1.0,
         seed: Optional[int] = None,
-    ):
+    ) -> AsyncIterator[str]:
         """
-        Generate response from the model with streaming.
+        Generate response from the model with token streaming.
 
         Args:
             messages: List of message dictionaries
@@ -190,34 +361,137 @@ class Qwen3VLInferenceEngine:
 
         Yields:
             Generated text chunks
+
+        Raises:
+            ServerOverloadedError: If the admission controller rejects the request
         """
         if self.model is None or self.processor is None:
             raise RuntimeError("Model not initialized")
 
+        if self.admission is not None:
+            self.admission.acquire(max_tokens)
+        generated_tokens = 0
+        request_id = uuid.uuid4().hex
         try:
-            # Prepare inputs
-            inputs = self.prepare_image_inputs(messages)
-
-            # Create sampling parameters
-            sampling_params = SamplingParams(
-                max_tokens=max_tokens,
-                temperature=temperature,
-                top_p=top_p,
-                seed=seed if seed is not None else 0,
+            # Prepare inputs off the event loop
+            inputs = await asyncio.to_thread(self.prepare_image_inputs, messages)
+            sampling_params = self._make_sampling_params(
+                max_tokens, temperature, top_p, seed, "delta"
             )
 
-            # Generate with streaming
-            accumulated_text = ''
-            for output in self.model.generate(inputs, sampling_params=sampling_params):
-                for completion in output.outputs:
-                    new_text = completion.text
-                    if new_text:
-                        # Yield only the new portion
-                        yield new_text[len(accumulated_text):]
-                        accumulated_text = new_text
+            # Generate with streaming; in delta mode vLLM returns only the new text
+            async for output in self.model.generate(
+                inputs, sampling_params, request_id=request_id
+            ):
+                if output.outputs:
+                    generated_tokens += len(output.outputs[0].token_ids)
+                    if output.outputs[0].text:
+                        yield output.outputs[0].text
+        except (asyncio.CancelledError, GeneratorExit):
+            # Client went away: free the request's KV cache blocks right away
+            await self._abort(request_id)
+            raise
         except Exception as e:
-            logger.error(f"Streaming generation failed: {e}")
+            logger.error("Streaming generation failed: %s", e)
             raise
+        finally:
+            if self.admission is not None:
+                self.admission.release(max_tokens, generated_tokens)
+
+    def check_admission(self) -> None:
+        """
+        Raise now if the admission controller would reject a new request.
+
+        Streaming routes call this before sending response headers, so overload
+        is reported as a 503 rather than as an error event inside a 200 stream.
+
+        Raises:
+            ServerOverloadedError: If the engine is saturated
+        """
+        if self.admission is not None:
+            self.admission.check()
+
+    async def _abort(self, request_id: str) -> None:
+        """
+        Abort a request in the vLLM engine.
+
+        Aborting an unknown or already finished request is a no-op.
+
+        Args:
+            request_id: vLLM request ID
+        """
+        try:
+            await self.model.abort(request_id)
+            logger.info("Aborted request %s", request_id)
+        except Exception as e:
+            logger.warning("Failed to abort request %s: %s", request_id, e)
+
+    async def warmup(self, pixel_budgets: List[int]) -> None:
+        """
+        Run one short request per image size before serving traffic.
+
+        The first request at a given vision input shape pays for kernel
+        selection and compilation in the vision encoder; doing it here keeps
+        that latency away from the first real clients.
+
+        Args:
+            pixel_budgets: Image pixel budgets (min_pixels == max_pixels) to warm up
+        """
+        from PIL import Image
+
+        for pixels in pixel_budgets:
+            side = math.isqrt(pixels)
+            messages = [{
+                "role": "user",
+                "content": [
+                    {
+                        "type": "image",
+                        "image": Image.new("RGB", (side, side)),
+                        "min_pixels": pixels,
+                        "max_pixels": pixels,
+                    },
+                    {"type": "text", "text": "Describe the image."},
+                ],
+            }]
+            try:
+                # Kept out of admission control: 1-token requests would skew
+                # its throughput estimate
+                await self.generate_async(messages, max_tokens=1, use_admission=False)
+                logger.info("Warm-up finished for %s pixel images", pixels)
+            except Exception as e:
+                logger.warning("Warm-up failed for %s pixel images: %s", pixels, e)
+
+    async def shutdown(self) -> None:
+        """Shut down the async engine and its background workers."""
+        if self.model is not None:
+            self.model.shutdown()
+
+    @staticmethod
+    @functools.lru_cache(maxsize=64)
+    def _make_sampling_params(
+        max_tokens: int,
+        temperature: float,
+        top_p: float,
+        seed: Optional[int],
+        output_kind: str = "cumulative",
+    ) -> "SamplingParams":
+        """
+        Create sampling parameters, reusing instances for repeated settings.
+
+        The returned object is shared between requests and must not be
+        modified; vLLM clones sampling parameters when a request is added.
+        ``output_kind`` is a ``RequestOutputKind`` name: cumulative, delta or final_only.
+        """
+        from vllm import SamplingParams
+        from vllm.sampling_params import RequestOutputKind
+
+        return SamplingParams(
+            max_tokens=max_tokens,
+            temperature=temperature,
+            top_p=top_p,
+            seed=seed if seed is not None else 0,
+            output_kind=RequestOutputKind[output_kind.upper()],
+        )
 
     def is_ready(self) -> bool:
         """Check if the engine is ready."""
@@ -0,0 +1,117 @@
+"""Content-addressed cache of inference results."""
+import asyncio
+import hashlib
+import logging
+import struct
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.config import settings
+from app.core.utils import messages_fingerprint
+
+logger = logging.getLogger(__name__)
+
+
+def result_cache_key(
+    messages: List[dict],
+    max_tokens: int,
+    temperature: float,
+    top_p: float,
+    seed: Optional[int],
+) -> Optional[bytes]:
+    """
+    Build a cache key from message content and sampling parameters.
+
+    Args:
+        messages: List of message dictionaries
+        max_tokens: Maximum number of tokens to generate
+        temperature: Sampling temperature
+        top_p: Top-p sampling parameter
+        seed: Random seed
+
+    Returns:
+        16-byte key, or None if the request must not be cached (sampled
+        output, or media that is not content-addressed)
+    """
+    if temperature > 0:
+        return None
+
+    content_key = messages_fingerprint(messages)
+    if content_key is None:
+        return None
+
+    params = struct.pack("<ddqq", temperature, top_p, max_tokens, seed or 0)
+    return hashlib.sha256(content_key + params, usedforsecurity=False).digest()[:16]
+
+
+class ResultCache:
+    """
+    LRU cache of inference results that also coalesces in-flight duplicates.
+
+    Concurrent requests with the same key share a single computation; failed
+    computations are not cached. A computation is cancelled once every caller
+    waiting on it has been cancelled.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        """
+        Initialize result cache.
+
+        Args:
+            maxsize: Maximum number of cached results
+        """
+        self.maxsize = maxsize
+        self._items: "OrderedDict[bytes, asyncio.Future]" = OrderedDict()
+        self._waiters: Dict[asyncio.Future, int] = {}
+
+    async def get_or_compute(
+        self,
+        key: Optional[bytes],
+        compute: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """
+        Return the cached result for ``key`` or compute and cache it.
+
+        Args:
+            key: Cache key (None disables caching for this call)
+            compute: Factory returning the awaitable that produces the result
+
+        Returns:
+            Computation result
+        """
+        if key is None or self.maxsize <= 0:
+            return await compute()
+
+        task = self._items.get(key)
+        if task is not None:
+            self._items.move_to_end(key)
+            logger.debug("Result cache hit")
+        else:
+            task = asyncio.ensure_future(compute())
+            task.add_done_callback(lambda done: self._discard_failed(key, done))
+            self._items[key] = task
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+        # Shield so one caller going away doesn't cancel the shared computation,
+        # but cancel it when no caller is left waiting for the result
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if self._waiters[task] == 1:
+                task.cancel()
+            raise
+        finally:
+            self._waiters[task] -= 1
+            if not self._waiters[task]:
+                del self._waiters[task]
+
+    def _discard_failed(self, key: bytes, task: asyncio.Future) -> None:
+        """Drop failed or cancelled computations so they are retried."""
+        if task.cancelled() or task.exception() is not None:
+            if self._items.get(key) is task:
+                del self._items[key]
+
+
+result_cache = ResultCache(maxsize=settings.result_cache_size)
@@ -1,40 +1,384 @@
 """Utility functions for image and video processing."""
-import base64
 import io
+import json
+import math
 import os
+import functools
 import hashlib
+import shutil
+import tempfile
+import threading
+import time
 import requests
-from typing import Optional, List, Tuple, Union
-from PIL import Image
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from types import MappingProxyType
+from typing import Any, BinaryIO, Callable, Dict, Mapping, Optional, List, Tuple, Union
 import numpy as np
+from PIL import Image
 import logging
+import msgspec
+from app.config import settings
+from app.schemas import OCRItem
+
+try:
+    # SIMD-accelerated base64 codec (SSSE3/AVX2), API-compatible with stdlib
+    from pybase64 import b64decode, b64encode_as_string
+except ImportError:  # pragma: no cover - fallback when pybase64 is not installed
+    import base64
+    from base64 import b64decode
+
+    def b64encode_as_string(data: bytes) -> str:
+        """Encode bytes to a base64 ``str`` (stdlib fallback)."""
+        return base64.b64encode(data).decode('ascii')
 
 logger = logging.getLogger(__name__)
 
+# Chunk size for streaming base64 decoding (must be a multiple of 4)
+BASE64_DECODE_CHUNK_SIZE = 3 * 1024 * 1024
+
+# Read size for streaming base64 encoding (must be a multiple of 3)
+BASE64_ENCODE_CHUNK_SIZE = 3 * 1024 * 1024
+
+# Write buffer size for video files
+VIDEO_IO_BUFFER_SIZE = 1 << 20
+
+# Opening fence of a markdown JSON block in model responses
+_JSON_FENCE = '```json'
+
+# Qwen3-VL vision patch size (16) times spatial merge size (2)
+IMAGE_SIZE_FACTOR = 32
+
+# (min_pixels, max_pixels) defaults used by the image services
+SERVICE_PIXEL_RANGES = (
+    (64 * 32 * 32, 2048 * 32 * 32),
+    (512 * 32 * 32, 2048 * 32 * 32),
+    (512 * 32 * 32, 4608 * 32 * 32),
+)
+
+# Common input sizes (landscape): 720p, 1080p, 4K, A4 at 150 and 200 dpi
+COMMON_IMAGE_SIZES = ((1280, 720), (1920, 1080), (3840, 2160), (1754, 1240), (2339, 1654))
+
+# Typed decoder for OCR spotting output
+_OCR_ITEMS_DECODER = msgspec.json.Decoder(List[OCRItem])
+
+# Image.info key holding the fingerprint of an image's encoded source bytes
+SOURCE_FINGERPRINT_KEY = 'source_fingerprint'
+
+# Only used for its C scanner, to find where the first JSON value ends
+_JSON_SCANNER = json.JSONDecoder()
+
+
+def _create_http_session() -> requests.Session:
+    """Create a pooled HTTP session shared by all downloads."""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=settings.http_pool_connections,
+        pool_maxsize=settings.http_pool_maxsize,
+        max_retries=Retry(
+            total=settings.http_max_retries,
+            backoff_factor=0.2,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset(["GET", "HEAD"]),
+        ),
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+# Shared session keeps TCP/TLS connections alive between downloads
+_SESSION = _create_http_session()
+
+# Shared pool for fanning out downloads and decodes within one request. It is
+# separate from the "preprocess" pool those requests already run on, so a
+# preprocess thread waiting on its fetches can never starve them.
+_FETCH_EXECUTOR = ThreadPoolExecutor(
+    max_workers=settings.frame_prefetch_workers,
+    thread_name_prefix="fetch",
+)
+
+
+def fingerprint(buf: bytes) -> bytes:
+    """
+    Compute a compact content fingerprint for cache keys.
+
+    Uses SHA-256 (SHA-NI accelerated through OpenSSL on modern x86) over a
+    memoryview, so large buffers are hashed in C without copying.
+
+    Args:
+        buf: Raw bytes to fingerprint
+
+    Returns:
+        16-byte digest
+    """
+    return hashlib.sha256(memoryview(buf), usedforsecurity=False).digest()[:16]
+
+
+def image_fingerprint(image: Image.Image) -> str:
+    """
+    Compute a content fingerprint of a decoded image.
+
+    Images produced by ``decode_image_bytes`` carry a fingerprint of their
+    encoded source; mode and size conversions keep it in ``info``, so the
+    pixels need not be copied out and hashed. Other images are hashed
+    pixel by pixel. Uses BLAKE2b, which is fast on CPUs without SHA extensions.
+
+    Args:
+        image: PIL Image
+
+    Returns:
+        32-character hex digest
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{image.mode}:{image.size}".encode())
+    source = image.info.get(SOURCE_FINGERPRINT_KEY)
+    if source is not None:
+        digest.update(source)
+    else:
+        digest.update(image.tobytes())
+    return digest.hexdigest()
+
+
+# Video item options that change the frames the model sees
+_VIDEO_FINGERPRINT_KEYS = (
+    "total_pixels", "min_pixels", "max_pixels", "max_frames",
+    "sample_fps", "fps", "nframes", "resized_height", "resized_width",
+)
+
+
+def video_fingerprint(item: dict) -> Optional[str]:
+    """
+    Compute a content fingerprint of a frame-list video item.
+
+    Covers every frame and the sampling options applied to them. Frames
+    must be decoded images or data URLs; video files and remote frames are
+    not content-addressed, so ``None`` is returned for them.
+
+    Args:
+        item: Video content item of a message
+
+    Returns:
+        32-character hex digest or None if the video is not fingerprintable
+    """
+    frames = item.get("video")
+    if not isinstance(frames, list):
+        return None
+
+    digest = hashlib.blake2b(digest_size=16)
+    for key in _VIDEO_FINGERPRINT_KEYS:
+        digest.update(f"{key}={item.get(key)};".encode())
+    for frame in frames:
+        if isinstance(frame, Image.Image):
+            digest.update(image_fingerprint(frame).encode())
+        elif isinstance(frame, str) and frame.startswith("data:"):
+            digest.update(fingerprint(frame.encode()))
+        else:
+            return None
+    return digest.hexdigest()
+
+
+def messages_fingerprint(messages: List[dict]) -> Optional[bytes]:
+    """
+    Compute a content fingerprint of a message list for caching.
+
+    Only messages whose media are inline (data URLs) are fingerprinted;
+    remote URLs, local paths and decoded frames may change between
+    requests, so ``None`` is returned for them.
+
+    Args:
+        messages: List of message dictionaries
+
+    Returns:
+        16-byte digest or None if the messages are not cacheable
+    """
+    digest = hashlib.sha256(usedforsecurity=False)
+    for message in messages:
+        digest.update(message["role"].encode())
+        content = message["content"]
+        if isinstance(content, str):
+            digest.update(content.encode())
+            continue
+        for item in content:
+            for key in sorted(item):
+                value = item[key]
+                if key in ("image", "video") and not (
+                    isinstance(value, str) and value.startswith("data:")
+                ):
+                    return None
+                digest.update(key.encode())
+                digest.update(str(value).encode())
+    return digest.digest()[:16]
+
+
+class LRUCache:
+    """Thread-safe LRU cache keyed by content fingerprint, with optional expiry and byte budget."""
+
+    def __init__(
+        self,
+        maxsize: int = 256,
+        ttl: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+        sizeof: Optional[Callable[[Any], int]] = None,
+    ):
+        """
+        Initialize cache.
+
+        Args:
+            maxsize: Maximum number of cached entries
+            ttl: Seconds after which an entry expires (None keeps entries until evicted)
+            max_bytes: Maximum total size of cached values (None for no limit);
+                values larger than 1/8 of it are not cached, so a single huge
+                entry cannot flush the rest of the cache
+            sizeof: Size of a value in bytes, required with ``max_bytes``
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.nbytes = 0
+        self._items: "OrderedDict[Any, Tuple[Any, float, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Any) -> Optional[Any]:
+        """Return cached value and mark it as recently used."""
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is None:
+                return None
+            value, expires_at, size = entry
+            if expires_at < time.monotonic():
+                del self._items[key]
+                self.nbytes -= size
+                return None
+            self._items.move_to_end(key)
+            return value
+
+    def put(self, key: Any, value: Any) -> None:
+        """Store value, evicting the least recently used entries if full."""
+        if self.maxsize <= 0:
+            return
+        size = 0
+        if self.max_bytes is not None:
+            size = self.sizeof(value)
+            if size > self.max_bytes // 8:
+                return
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else math.inf
+        with self._lock:
+            previous = self._items.pop(key, None)
+            if previous is not None:
+                self.nbytes -= previous[2]
+            self._items[key] = (value, expires_at, size)
+            self.nbytes += size
+            while len(self._items) > self.maxsize or (
+                self.max_bytes is not None and self.nbytes > self.max_bytes
+            ):
+                _, (_, _, evicted_size) = self._items.popitem(last=False)
+                self.nbytes -= evicted_size
+
 
-def decode_base64_image(base64_str: str) -> Image.Image:
+def image_nbytes(image: Image.Image) -> int:
+    """Approximate in-memory size of a decoded image (width * height * bands)."""
+    width, height = image.size
+    return width * height * len(image.getbands())
+
+
+_image_cache = LRUCache(
+    maxsize=settings.image_cache_size,
+    max_bytes=settings.image_cache_max_bytes,
+    sizeof=image_nbytes,
+)
+
+# Remote images may change, so they are cached by URL only for a limited time
+_url_image_cache = LRUCache(
+    maxsize=settings.image_cache_size,
+    ttl=settings.image_url_cache_ttl,
+    max_bytes=settings.image_cache_max_bytes,
+    sizeof=image_nbytes,
+)
+_url_downloads: Dict[Tuple[str, Optional[int]], Future] = {}
+_url_downloads_lock = threading.Lock()
+
+
+def decode_image_bytes(image_data: bytes, max_pixels: Optional[int] = None) -> Image.Image:
+    """
+    Decode raw image bytes to PIL Image, reusing previously decoded images.
+
+    When ``max_pixels`` is given, JPEGs larger than the budget are decoded at a
+    reduced DCT scale (shrink-on-load), which is several times faster than a
+    full decode followed by a resize. The result is never smaller than the budget.
+
+    Cached images are shared between requests and must not be modified in place.
+
+    Args:
+        image_data: Encoded image bytes (JPEG, PNG, ...)
+        max_pixels: Pixel budget the image will be resized to downstream
+
+    Returns:
+        PIL Image object
+    """
+    key = (fingerprint(image_data), max_pixels)
+    image = _image_cache.get(key)
+    if image is None:
+        image = Image.open(io.BytesIO(image_data))
+        if max_pixels and image.format == 'JPEG':
+            width, height = image.size
+            scale = math.sqrt(max_pixels / (width * height))
+            if scale < 1:
+                image.draft('RGB', (math.ceil(width * scale), math.ceil(height * scale)))
+        image.load()
+        # The decoded pixels depend only on the source bytes and the shrink-on-load budget
+        image.info[SOURCE_FINGERPRINT_KEY] = key[0] + str(max_pixels).encode()
+        _image_cache.put(key, image)
+    return image
+
+
+def decode_base64_image(base64_str: str, max_pixels: Optional[int] = None) -> Image.Image:
     """
     Decode base64 string to PIL Image.
 
     Args:
         base64_str: Base64 encoded image string
+        max_pixels: Optional pixel budget used to shrink JPEGs while decoding
 
     Returns:
         PIL Image object
     """
     # Remove data URL prefix if present
-    if 'base64,' in base64_str:
-        base64_str = base64_str.split('base64,')[1]
+    if base64_str.startswith('data:'):
+        base64_str = base64_str[base64_str.find('base64,') + len('base64,'):]
 
-    image_data = base64.b64decode(base64_str)
-    image = Image.open(io.BytesIO(image_data))
-    return image
+    image_data = b64decode(base64_str, validate=False)
+    return decode_image_bytes(image_data, max_pixels=max_pixels)
+
+
+def encode_file_to_base64(path: str) -> str:
+    """
+    Encode file contents to base64 string, reading the file in chunks.
+
+    Args:
+        path: Path to file
+
+    Returns:
+        Base64 encoded string
+    """
+    parts = []
+    with open(path, 'rb') as f:
+        while chunk := f.read(BASE64_ENCODE_CHUNK_SIZE):
+            parts.append(b64encode_as_string(chunk))
+    return ''.join(parts)
 
 
 def encode_image_to_base64(image: Union[Image.Image, str]) -> str:
     """
     Encode PIL Image or image path to base64 string.
 
+    Pass a path to send a file verbatim without re-encoding. PIL Images are
+    always re-encoded, since they may have been modified after loading; images
+    decoded from JPEG stay JPEG, everything else is saved losslessly.
+
     Args:
         image: PIL Image or path to image file
 
@@ -42,34 +386,255 @@ def encode_image_to_base64(image: Union[Image.Image, str]) -> str:
         Base64 encoded string
     """
     if isinstance(image, str):
-        with open(image, 'rb') as f:
-            return base64.b64encode(f.read()).decode('utf-8')
+        return encode_file_to_base64(image)
 
     buffered = io.BytesIO()
-    image.save(buffered, format=image.format or 'PNG')
-    return base64.b64encode(buffered.getvalue()).decode('utf-8')
+    if image.format == 'JPEG':
+        image.save(buffered, format='JPEG', quality=95, optimize=False)
+    else:
+        image.save(buffered, format=image.format or 'PNG')
+    return b64encode_as_string(buffered.getvalue())
 
 
-def download_image(url: str) -> Image.Image:
+def download_image(url: str, max_pixels: Optional[int] = None) -> Image.Image:
     """
-    Download image from URL.
+    Download image from URL, reusing recent downloads of the same URL.
+
+    Concurrent calls for the same URL share a single download.
 
     Args:
         url: Image URL
+        max_pixels: Optional pixel budget used to shrink JPEGs while decoding
 
     Returns:
         PIL Image object
     """
+    key = (url, max_pixels)
+    image = _url_image_cache.get(key)
+    if image is not None:
+        return image
+
+    with _url_downloads_lock:
+        download = _url_downloads.get(key)
+        if download is not None:
+            owner = False
+        else:
+            owner = True
+            download = _url_downloads[key] = Future()
+    if not owner:
+        return download.result()
+
     try:
-        response = requests.get(url, timeout=30)
-        response.raise_for_status()
-        image = Image.open(io.BytesIO(response.content))
+        data = fetch_bytes(url, max_bytes=settings.max_image_bytes)
+        image = decode_image_bytes(data, max_pixels=max_pixels)
+        _url_image_cache.put(key, image)
+        download.set_result(image)
         return image
     except Exception as e:
-        logger.error(f"Failed to download image from {url}: {e}")
+        download.set_exception(e)
+        raise
+    finally:
+        with _url_downloads_lock:
+            del _url_downloads[key]
+
+
+def fetch_bytes(url: str, timeout: int = 30, max_bytes: Optional[int] = None) -> bytes:
+    """
+    Download raw bytes from URL using the shared session.
+
+    Args:
+        url: Resource URL
+        timeout: Request timeout in seconds
+        max_bytes: Reject bodies larger than this; read incrementally so an
+            oversized body is never held in memory (None for no limit)
+
+    Returns:
+        Response body
+    """
+    try:
+        with _SESSION.get(url, timeout=timeout, stream=max_bytes is not None) as response:
+            response.raise_for_status()
+            if max_bytes is None:
+                return response.content
+
+            content_length = response.headers.get("content-length")
+            if content_length is not None and content_length.isdigit() and int(content_length) > max_bytes:
+                raise ValueError(f"Response from {url} exceeds {max_bytes} bytes")
+
+            data = bytearray()
+            for chunk in response.iter_content(chunk_size=1 << 16):
+                data += chunk
+                if len(data) > max_bytes:
+                    raise ValueError(f"Response from {url} exceeds {max_bytes} bytes")
+            return bytes(data)
+    except Exception as e:
+        logger.error("Failed to download %s: %s", url, e)
         raise
 
 
+def prefetch_frames(urls: List[str]) -> List[bytes]:
+    """
+    Download video frames concurrently on the shared fetch pool.
+
+    Args:
+        urls: List of frame URLs
+
+    Returns:
+        List of frame bytes in the same order as ``urls``
+    """
+    return list(_FETCH_EXECUTOR.map(fetch_bytes, urls))
+
+
+@functools.lru_cache(maxsize=1024)
+def target_image_size(
+    width: int,
+    height: int,
+    min_pixels: int,
+    max_pixels: int,
+    factor: int = IMAGE_SIZE_FACTOR,
+) -> Tuple[int, int]:
+    """
+    Compute the model input size of an image, exactly as qwen_vl_utils does.
+
+    Memoized: services use a few pixel ranges and clients send images in a
+    few common sizes, so most lookups are cache hits.
+
+    Args:
+        width: Image width
+        height: Image height
+        min_pixels: Minimum pixels for image processing
+        max_pixels: Maximum pixels for image processing
+        factor: Size granularity (vision patch size times spatial merge size)
+
+    Returns:
+        Target (width, height)
+    """
+    from qwen_vl_utils.vision_process import smart_resize
+
+    resized_height, resized_width = smart_resize(
+        height, width, factor=factor, min_pixels=min_pixels, max_pixels=max_pixels
+    )
+    return resized_width, resized_height
+
+
+def prime_image_size_cache(factor: int = IMAGE_SIZE_FACTOR) -> None:
+    """
+    Precompute target sizes for the services' pixel ranges and common image sizes.
+
+    Args:
+        factor: Size granularity (vision patch size times spatial merge size)
+    """
+    for min_pixels, max_pixels in SERVICE_PIXEL_RANGES:
+        for width, height in COMMON_IMAGE_SIZES:
+            target_image_size(width, height, min_pixels, max_pixels, factor)
+            target_image_size(height, width, min_pixels, max_pixels, factor)
+
+
+def load_message_images(messages: List[dict], factor: int = IMAGE_SIZE_FACTOR) -> List[dict]:
+    """
+    Replace data URL and HTTP(S) URL images in messages with decoded PIL images.
+
+    Inline images are decoded with the SIMD base64 decoder and remote ones are
+    downloaded over the shared pooled session; JPEGs shrink on load. Several
+    images in a message are loaded in parallel, then each is resized to its
+    model input size so qwen_vl_utils has no resizing left to do. Input
+    messages are not modified.
+
+    Args:
+        messages: List of message dictionaries
+        factor: Size granularity (vision patch size times spatial merge size)
+
+    Returns:
+        Messages with images decoded
+    """
+    items = [
+        item
+        for message in messages
+        if isinstance(message.get("content"), list)
+        for item in message["content"]
+        if item.get("type") == "image"
+        and isinstance(item.get("image"), str)
+        and item["image"].startswith(("data:", "http://", "https://"))
+    ]
+    if not items:
+        return messages
+
+    def decode(item: dict) -> Image.Image:
+        source = item["image"]
+        if source.startswith("data:"):
+            image = decode_base64_image(source, max_pixels=item.get("max_pixels"))
+        else:
+            image = download_image(source, max_pixels=item.get("max_pixels"))
+        # Other modes are converted to RGB by qwen_vl_utils before resizing; leave those to it
+        if (
+            image.mode in ("RGB", "L")
+            and "min_pixels" in item
+            and "max_pixels" in item
+            and "resized_height" not in item
+        ):
+            size = target_image_size(
+                image.width, image.height, item["min_pixels"], item["max_pixels"], factor
+            )
+            if size != image.size:
+                image = image.resize(size, Image.BICUBIC)
+        return image
+
+    if len(items) == 1:
+        images = [decode(items[0])]
+    else:
+        # Downloads overlap and Pillow releases the GIL while decoding and resizing
+        images = list(_FETCH_EXECUTOR.map(decode, items))
+
+    decoded = {id(item): image for item, image in zip(items, images)}
+    return [
+        {
+            **message,
+            "content": [
+                {**item, "image": decoded[id(item)]} if id(item) in decoded else item
+                for item in message["content"]
+            ],
+        }
+        if isinstance(message.get("content"), list)
+        else message
+        for message in messages
+    ]
+
+
+def copy_file_object(src: BinaryIO, dst: BinaryIO, chunk_size: int = VIDEO_IO_BUFFER_SIZE) -> None:
+    """
+    Copy a file object into another, using zero-copy ``os.sendfile`` when possible.
+
+    When ``src`` is backed by a real file descriptor (e.g. a spooled upload that
+    has rolled over to disk), data is copied in-kernel without passing through
+    userspace buffers. In-memory sources fall back to a chunked copy.
+
+    Args:
+        src: Source file object, positioned at the start of the data
+        dst: Destination file object
+        chunk_size: Buffer size for the fallback copy
+    """
+    # Calling fileno() on an in-memory spooled file would force it to disk
+    in_memory = isinstance(src, tempfile.SpooledTemporaryFile) and not getattr(src, '_rolled', False)
+    if hasattr(os, 'sendfile') and not in_memory:
+        try:
+            src_fd = src.fileno()
+            dst_fd = dst.fileno()
+        except (AttributeError, OSError, io.UnsupportedOperation):
+            pass
+        else:
+            dst.flush()
+            offset = src.tell()
+            size = os.fstat(src_fd).st_size
+            while offset < size:
+                sent = os.sendfile(dst_fd, src_fd, offset, size - offset)
+                if sent == 0:
+                    break
+                offset += sent
+            return
+
+    shutil.copyfileobj(src, dst, chunk_size)
+
+
 def get_image_from_request(
     image_url: Optional[str] = None,
     image_base64: Optional[str] = None,
@@ -96,10 +661,13 @@ def get_image_from_request(
         raise ValueError("Either image_url or image_base64 must be provided")
 
 
-def decode_base64_video(base64_str: str, output_path: str) -> str:
+def decode_base64_video(base64_str: Union[str, bytes], output_path: str) -> str:
     """
     Decode base64 string to video file.
 
+    The payload is decoded in fixed-size chunks straight into the output file,
+    so memory usage stays flat regardless of the video size.
+
     Args:
         base64_str: Base64 encoded video string
         output_path: Path where to save the video file
@@ -108,19 +676,27 @@ def decode_base64_video(base64_str: str, output_path: str) -> str:
         Path to the saved video file
     """
     try:
-        # Remove data URL prefix if present
-        if 'base64,' in base64_str:
-            base64_str = base64_str.split('base64,')[1]
+        # Skip data URL prefix if present (without copying the payload)
+        marker = 'base64,' if isinstance(base64_str, str) else b'base64,'
+        prefix_end = base64_str.find(marker)
+        start = prefix_end + len(marker) if prefix_end != -1 else 0
 
-        video_data = base64.b64decode(base64_str)
+        data = memoryview(base64_str) if isinstance(base64_str, bytes) else base64_str
+        newline = '\n' if isinstance(base64_str, str) else b'\n'
 
-        with open(output_path, 'wb') as f:
-            f.write(video_data)
+        with open(output_path, 'wb', buffering=VIDEO_IO_BUFFER_SIZE) as f:
+            if newline in base64_str:
+                # Line-wrapped payloads can't be split on 4-byte boundaries
+                f.write(b64decode(data[start:], validate=False))
+            else:
+                for offset in range(start, len(data), BASE64_DECODE_CHUNK_SIZE):
+                    chunk = data[offset:offset + BASE64_DECODE_CHUNK_SIZE]
+                    f.write(b64decode(chunk, validate=False))
 
-        logger.info(f"Video decoded and saved to {output_path}")
+        logger.info("Video decoded and saved to %s", output_path)
         return output_path
     except Exception as e:
-        logger.error(f"Failed to decode base64 video: {e}")
+        logger.error("Failed to decode base64 video: %s", e)
         raise
 
 
@@ -135,10 +711,9 @@ def encode_video_to_base64(video_path: str) -> str:
         Base64 encoded string
     """
     try:
-        with open(video_path, 'rb') as f:
-            return base64.b64encode(f.read()).decode('utf-8')
+        return encode_file_to_base64(video_path)
     except Exception as e:
-        logger.error(f"Failed to encode video to base64: {e}")
+        logger.error("Failed to encode video to base64: %s", e)
         raise
 
 
@@ -151,21 +726,22 @@ def download_video(url: str, dest_path: str) -> None:
         dest_path: Destination file path
     """
     try:
-        response = requests.get(url, stream=True, timeout=60)
-        response.raise_for_status()
-        with open(dest_path, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
-        logger.info(f"Video downloaded to {dest_path}")
+        with _SESSION.get(url, stream=True, timeout=60) as response:
+            response.raise_for_status()
+            with open(dest_path, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=VIDEO_IO_BUFFER_SIZE):
+                    f.write(chunk)
+        logger.info("Video downloaded to %s", dest_path)
     except Exception as e:
-        logger.error(f"Failed to download video from {url}: {e}")
+        logger.error("Failed to download video from %s: %s", url, e)
         raise
 
 
 def get_video_from_request(
     video_url: Optional[str] = None,
     video_base64: Optional[str] = None,
-    temp_dir: str = "/tmp"
+    temp_dir: str = "/tmp",
+    video_path: Optional[str] = None,
 ) -> str:
     """
     Get video path from request parameters.
@@ -174,11 +750,14 @@ def get_video_from_request(
         video_url: URL to video
         video_base64: Base64 encoded video
         temp_dir: Temporary directory for saving base64 videos
+        video_path: Local path to an already saved video file
 
     Returns:
         Video file path or URL
     """
-    if video_url:
+    if video_path:
+        return video_path
+    elif video_url:
         return video_url
     elif video_base64:
         # Save base64 video to temporary file
@@ -189,7 +768,31 @@ def get_video_from_request(
         decode_base64_video(video_base64, temp_file)
         return temp_file
     else:
-        raise ValueError("Either video_url or video_base64 must be provided")
+        raise ValueError("One of video_path, video_url or video_base64 must be provided")
+
+
+def sample_frame_indices(num_frames: int, max_frames: int) -> np.ndarray:
+    """
+    Pick evenly spaced indices of at most ``max_frames`` frames.
+
+    qwen_vl_utils uses every frame of a frame list regardless of
+    ``max_frames``, so frame lists are subsampled before any frame is fetched
+    or decoded. The count is kept even because frames are paired into
+    temporal patches, except that ``max_frames <= 1`` keeps the middle frame.
+
+    Args:
+        num_frames: Number of frames available
+        max_frames: Maximum number of frames to keep
+
+    Returns:
+        Sorted int64 array of frame indices
+    """
+    if num_frames <= max_frames:
+        return np.arange(num_frames, dtype=np.int64)
+    if max_frames <= 1:
+        return np.array([(num_frames - 1) // 2], dtype=np.int64)
+    count = max_frames - max_frames % 2
+    return np.linspace(0, num_frames - 1, count).round().astype(np.int64)
 
 
 def get_frames_from_request(
@@ -221,6 +824,34 @@ def get_frames_from_request(
         raise ValueError("Either frame_urls or frame_base64_list must be provided")
 
 
+@functools.lru_cache(maxsize=16)
+def _image_item_base(min_pixels: int, max_pixels: int) -> Mapping[str, Any]:
+    """Shared read-only image content fields for a pixel range."""
+    return MappingProxyType({
+        "type": "image",
+        "min_pixels": min_pixels,
+        "max_pixels": max_pixels,
+    })
+
+
+def build_image_item(image_input: Any, min_pixels: int, max_pixels: int) -> dict:
+    """
+    Build an image content item for a message.
+
+    Args:
+        image_input: Image URL, data URL or PIL image
+        min_pixels: Minimum pixels for image processing
+        max_pixels: Maximum pixels for image processing
+
+    Returns:
+        Image content dictionary
+    """
+    # Copying a ready-made mapping presizes the dict in one step
+    item = dict(_image_item_base(min_pixels, max_pixels))
+    item["image"] = image_input
+    return item
+
+
 def build_image_message(
     image_input: str,
     prompt: str,
@@ -239,28 +870,19 @@ def build_image_message(
     Returns:
         List of message dictionaries
     """
-    messages = [
+    return [
         {
             "role": "user",
             "content": [
-                {
-                    "type": "image",
-                    "image": image_input,
-                    "min_pixels": min_pixels,
-                    "max_pixels": max_pixels,
-                },
-                {
-                    "type": "text",
-                    "text": prompt,
-                },
+                build_image_item(image_input, min_pixels, max_pixels),
+                {"type": "text", "text": prompt},
             ],
         }
     ]
-    return messages
 
 
 def build_video_message(
-    video_input: Union[str, List[str]],
+    video_input: Union[str, List[str], List[Image.Image]],
     prompt: str,
     total_pixels: int = 20480 * 32 * 32,
     min_pixels: int = 64 * 32 * 32,
@@ -271,7 +893,7 @@ def build_video_message(
     Build message format for video inference.
 
     Args:
-        video_input: Video URL or list of frame URLs
+        video_input: Video URL, list of frame URLs or list of decoded frames
         prompt: Text prompt
         total_pixels: Total pixels budget
         min_pixels: Minimum pixels per frame
@@ -323,6 +945,19 @@ def build_video_message(
     return messages
 
 
+def sse_event(payload: Any) -> bytes:
+    """
+    Encode a payload as a Server-Sent Events ``data`` frame.
+
+    Args:
+        payload: JSON-serializable payload
+
+    Returns:
+        Encoded SSE frame
+    """
+    return b"data: " + msgspec.json.encode(payload) + b"\n\n"
+
+
 def parse_json_response(response: str) -> str:
     """
     Parse JSON from model response (removes markdown fencing).
@@ -333,15 +968,95 @@ def parse_json_response(response: str) -> str:
     Returns:
         Cleaned JSON string
     """
-    lines = response.splitlines()
-    for i, line in enumerate(lines):
-        if line.strip() == "```json":
-            response = "\n".join(lines[i + 1:])
-            response = response.split("```")[0]
-            break
+    start = response.find(_JSON_FENCE)
+    if start != -1:
+        start += len(_JSON_FENCE)
+        end = response.find('```', start)
+        response = response[start:end] if end != -1 else response[start:]
     return response.strip()
 
 
+def _json_span(text: str) -> str:
+    """Trim any prose around the outermost JSON array or object in ``text``."""
+    array_start = text.find('[')
+    object_start = text.find('{')
+    if array_start == -1 or (object_start != -1 and object_start < array_start):
+        start, closer = object_start, '}'
+    else:
+        start, closer = array_start, ']'
+    if start == -1:
+        return text
+    end = text.rfind(closer)
+    return text[start:end + 1] if end > start else text[start:]
+
+
+def _first_json_value(text: str) -> Optional[str]:
+    """
+    Return the first complete JSON array or object in ``text``.
+
+    Unlike ``_json_span`` this is not fooled by brackets in trailing prose,
+    at the cost of scanning the value once more.
+    """
+    starts = [i for i in (text.find('['), text.find('{')) if i != -1]
+    if not starts:
+        return None
+    start = min(starts)
+    try:
+        _, end = _JSON_SCANNER.raw_decode(text, start)
+    except ValueError:
+        return None
+    return text[start:end]
+
+
+def parse_ocr_items(response: str) -> Optional[List[OCRItem]]:
+    """
+    Decode and validate OCR spotting output in a single pass.
+
+    Markdown fencing and any prose around the JSON array are ignored.
+
+    Args:
+        response: Model response text
+
+    Returns:
+        List of OCR items, or None if the response is not valid OCR JSON
+    """
+    text = parse_json_response(response)
+    try:
+        return _OCR_ITEMS_DECODER.decode(_json_span(text))
+    except (msgspec.DecodeError, msgspec.ValidationError):
+        pass
+
+    # Slow path: the outermost brackets did not delimit a valid value
+    value = _first_json_value(text)
+    if value is None:
+        return None
+    try:
+        return _OCR_ITEMS_DECODER.decode(value)
+    except (msgspec.DecodeError, msgspec.ValidationError):
+        return None
+
+
+def ocr_items_to_columns(items: List[OCRItem]) -> dict:
+    """
+    Convert OCR items to a column-oriented (structure-of-arrays) result.
+
+    Coordinates are relative (0-1000), so they are rounded into a single
+    ``int16`` array of shape ``[N, 4]``; clients can scale all boxes at once.
+
+    Args:
+        items: Decoded OCR items
+
+    Returns:
+        Dictionary with ``bbox_2d`` (list of ``[x1, y1, x2, y2]``) and
+        ``text_content`` (list of strings) in matching order
+    """
+    bboxes = np.rint(np.asarray([item.bbox_2d for item in items], dtype=np.float32))
+    return {
+        "bbox_2d": bboxes.astype(np.int16).reshape(-1, 4).tolist(),
+        "text_content": [item.text_content for item in items],
+    }
+
+
 def build_grounding_prompt(
     categories: Optional[List[str]] = None,
     include_attributes: bool = False,
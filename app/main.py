@@ -1,17 +1,57 @@
 """Main FastAPI application."""
+import asyncio
+import atexit
 import logging
+import logging.config
+import queue
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from logging.handlers import QueueHandler, QueueListener
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from app.config import settings
-from app.api.routes import router, set_engine
+from app.api.middleware import RequestSizeLimitMiddleware
+from app.api.routes import router, set_engine, UPLOAD_DIR
+from app.core.admission import AdmissionController, ServerOverloadedError
 from app.core.inference_engine import Qwen3VLInferenceEngine
+from app.core.utils import prime_image_size_cache
+
+LOGGING_CONFIG = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "default": {"format": "%(asctime)s - %(name)s - %(levelname)s - %(message)s"},
+    },
+    "handlers": {
+        "console": {"class": "logging.StreamHandler", "formatter": "default"},
+    },
+    "root": {"level": "INFO", "handlers": ["console"]},
+}
+
+
+def setup_logging() -> QueueListener:
+    """
+    Configure logging with handler I/O moved to a background thread.
+
+    Callers only enqueue records; a QueueListener formats and writes them, so
+    request handlers never block on the output stream.
+
+    Returns:
+        Running queue listener
+    """
+    logging.config.dictConfig(LOGGING_CONFIG)
+    root = logging.getLogger()
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, *root.handlers, respect_handler_level=True)
+    root.handlers = [QueueHandler(log_queue)]
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
 
 # Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-)
+setup_logging()
 logger = logging.getLogger(__name__)
 
 
@@ -24,7 +64,17 @@ async def lifespan(app: FastAPI):
     """
     # Startup
     logger.info("Starting Qwen3-VL Inference Server...")
-    logger.info(f"Model path: {settings.model_path}")
+    logger.info("Model path: %s", settings.model_path)
+
+    UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+
+    # Thread pool behind asyncio.to_thread, where image/video preprocessing runs
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(
+            max_workers=settings.preprocess_workers,
+            thread_name_prefix="preprocess",
+        )
+    )
 
     try:
         # Initialize inference engine
@@ -35,22 +85,46 @@ async def lifespan(app: FastAPI):
             trust_remote_code=settings.trust_remote_code,
             enforce_eager=settings.enforce_eager,
             max_model_len=settings.max_model_len,
+            inputs_cache_size=settings.inputs_cache_size,
+            inputs_cache_max_bytes=settings.image_cache_max_bytes,
+            max_num_seqs=settings.max_num_seqs,
+            max_num_batched_tokens=settings.max_num_batched_tokens,
+            long_prefill_token_threshold=settings.long_prefill_token_threshold,
+            enable_prefix_caching=settings.enable_prefix_caching,
+            mm_processor_cache_gb=settings.mm_processor_cache_gb,
+            mm_encoder_tp_mode=settings.mm_encoder_tp_mode,
+            quantization=settings.quantization,
+            kv_cache_dtype=settings.kv_cache_dtype,
+            video_pruning_rate=settings.video_pruning_rate,
+            compilation_config=settings.compilation_config,
+            admission=(
+                AdmissionController(max_wait_s=settings.admission_max_wait_s)
+                if settings.admission_max_wait_s is not None
+                else None
+            ),
         )
 
+        # Precompute model input sizes for common images
+        prime_image_size_cache(engine.image_size_factor)
+
+        # Exercise common image shapes before accepting traffic
+        await engine.warmup(settings.warmup_pixel_budgets)
+
         # Set global engine instance
         set_engine(engine)
 
         logger.info("Inference engine initialized successfully")
-        logger.info(f"Server ready at http://{settings.host}:{settings.port}")
+        logger.info("Server ready at http://%s:%s", settings.host, settings.port)
 
     except Exception as e:
-        logger.error(f"Failed to initialize inference engine: {e}")
+        logger.error("Failed to initialize inference engine: %s", e)
         raise
 
     yield
 
     # Shutdown
     logger.info("Shutting down Qwen3-VL Inference Server...")
+    await engine.shutdown()
 
 
 # Create FastAPI application
@@ -85,6 +159,20 @@ app.add_middleware(
     allow_headers=settings.allow_headers,
 )
 
+# Reject oversized request bodies (pure ASGI, so client disconnects still reach routes)
+app.add_middleware(RequestSizeLimitMiddleware, max_bytes=settings.max_upload_bytes)
+
+
+@app.exception_handler(ServerOverloadedError)
+async def server_overloaded_handler(request: Request, exc: ServerOverloadedError):
+    """Reply 503 with a Retry-After hint when admission control rejects a request."""
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
 # Include API router
 app.include_router(router, prefix="/api")
 
@@ -102,8 +190,10 @@ async def root():
 
 
 if __name__ == "__main__":
+    import multiprocessing
     import uvicorn
 
+    multiprocessing.set_start_method("spawn", force=True)
     uvicorn.run(
         "app.main:app",
         host=settings.host,
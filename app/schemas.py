@@ -1,6 +1,7 @@
 """Pydantic schemas for request and response models."""
-from typing import Optional, Union, List, Any
-from pydantic import BaseModel, Field
+from typing import Annotated, Optional, Union, List, Any
+import msgspec
+from pydantic import BaseModel, Field, HttpUrl, model_validator
 from enum import Enum
 
 
@@ -27,26 +28,38 @@ class OutputFormat(str, Enum):
     QWENVL_MARKDOWN = "qwenvl_markdown"
 
 
-class BBox2D(BaseModel):
+# Relative coordinate in the model's 0-1000 space
+RelativeCoord = Annotated[float, msgspec.Meta(ge=0, le=1000)]
+
+
+# Model output shapes are msgspec structs: they are decoded and validated
+# in a single C pass and can appear hundreds of times per response.
+class BBox2D(msgspec.Struct, gc=False):
     """2D bounding box in relative coordinates (0-1000)."""
-    x1: float = Field(..., ge=0, le=1000, description="Top-left x coordinate")
-    y1: float = Field(..., ge=0, le=1000, description="Top-left y coordinate")
-    x2: float = Field(..., ge=0, le=1000, description="Bottom-right x coordinate")
-    y2: float = Field(..., ge=0, le=1000, description="Bottom-right y coordinate")
+    x1: RelativeCoord
+    y1: RelativeCoord
+    x2: RelativeCoord
+    y2: RelativeCoord
 
 
-class Point2D(BaseModel):
+class Point2D(msgspec.Struct, gc=False):
     """2D point in relative coordinates (0-1000)."""
-    x: float = Field(..., ge=0, le=1000, description="X coordinate")
-    y: float = Field(..., ge=0, le=1000, description="Y coordinate")
+    x: RelativeCoord
+    y: RelativeCoord
+
+
+class OCRItem(msgspec.Struct, gc=False):
+    """Text span spotted by OCR with its bounding box."""
+    bbox_2d: Annotated[List[RelativeCoord], msgspec.Meta(min_length=4, max_length=4)]
+    text_content: str
 
 
 class InferenceRequest(BaseModel):
     """Base inference request."""
     prompt: str = Field(..., description="Text prompt for the model")
-    max_tokens: Optional[int] = Field(2048, ge=1, description="Maximum tokens to generate")
-    temperature: Optional[float] = Field(0.0, ge=0.0, le=2.0, description="Sampling temperature")
-    top_p: Optional[float] = Field(1.0, ge=0.0, le=1.0, description="Top-p sampling parameter")
+    max_tokens: int = Field(2048, ge=1, description="Maximum tokens to generate")
+    temperature: float = Field(0.0, ge=0.0, le=2.0, description="Sampling temperature")
+    top_p: float = Field(1.0, gt=0.0, le=1.0, description="Top-p sampling parameter")
     seed: Optional[int] = Field(None, description="Random seed for reproducibility")
 
 
@@ -54,8 +67,8 @@ class ImageInferenceRequest(InferenceRequest):
     """Image-based inference request."""
     image_url: Optional[str] = Field(None, description="URL to the image")
     image_base64: Optional[str] = Field(None, description="Base64 encoded image")
-    min_pixels: Optional[int] = Field(64 * 32 * 32, description="Minimum pixels for image processing")
-    max_pixels: Optional[int] = Field(2048 * 32 * 32, description="Maximum pixels for image processing")
+    min_pixels: int = Field(64 * 32 * 32, description="Minimum pixels for image processing")
+    max_pixels: int = Field(2048 * 32 * 32, description="Maximum pixels for image processing")
 
 
 class VideoInferenceRequest(InferenceRequest):
@@ -64,10 +77,10 @@ class VideoInferenceRequest(InferenceRequest):
     video_base64: Optional[str] = Field(None, description="Base64 encoded video file")
     frame_urls: Optional[List[str]] = Field(None, description="List of frame URLs")
     frame_base64_list: Optional[List[str]] = Field(None, description="List of base64 encoded frames")
-    max_frames: Optional[int] = Field(2048, description="Maximum number of frames")
-    sample_fps: Optional[float] = Field(2.0, description="Sampling FPS")
-    total_pixels: Optional[int] = Field(20480 * 32 * 32, description="Total pixels budget")
-    min_pixels: Optional[int] = Field(64 * 32 * 32, description="Minimum pixels per frame")
+    max_frames: int = Field(2048, description="Maximum number of frames")
+    sample_fps: float = Field(2.0, description="Sampling FPS")
+    total_pixels: int = Field(20480 * 32 * 32, description="Total pixels budget")
+    min_pixels: int = Field(64 * 32 * 32, description="Minimum pixels per frame")
 
 
 class Grounding2DRequest(ImageInferenceRequest):
@@ -91,31 +104,75 @@ class VideoUnderstandingRequest(VideoInferenceRequest):
 class ImageDescriptionRequest(ImageInferenceRequest):
     """Image description request."""
     detail_level: str = Field("detailed", description="Level of detail: basic, detailed, comprehensive")
+    stream: bool = Field(False, description="Stream generated text as Server-Sent Events")
 
 
 class DocumentParsingRequest(ImageInferenceRequest):
     """Document parsing request."""
+    max_tokens: int = Field(4096, ge=1, description="Maximum tokens to generate")
+    min_pixels: int = Field(512 * 32 * 32, description="Minimum pixels for image processing")
+    max_pixels: int = Field(4608 * 32 * 32, description="Maximum pixels for image processing")
     output_format: OutputFormat = Field(
         OutputFormat.QWENVL_HTML,
         description="Output format: html, markdown, qwenvl_html, qwenvl_markdown"
     )
+    stream: bool = Field(False, description="Stream generated text as Server-Sent Events")
 
 
 class OCRRequest(ImageInferenceRequest):
     """OCR request."""
+    max_tokens: int = Field(4096, ge=1, description="Maximum tokens to generate")
+    min_pixels: int = Field(512 * 32 * 32, description="Minimum pixels for image processing")
     output_format: OutputFormat = Field(OutputFormat.TEXT, description="Output format")
     granularity: str = Field("line", description="OCR granularity: word, line, paragraph")
     include_bbox: bool = Field(False, description="Include bounding boxes")
+    stream: bool = Field(False, description="Stream generated text as Server-Sent Events")
 
 
 class ImageComparisonRequest(InferenceRequest):
     """Image comparison request for detecting differences between 2-4 images."""
-    image_urls: Optional[List[str]] = Field(None, description="List of image URLs (2-4 images)")
-    image_base64_list: Optional[List[str]] = Field(None, description="List of base64 encoded images (2-4 images)")
+    image_urls: Optional[List[HttpUrl]] = Field(
+        None, min_length=2, max_length=4, description="List of image URLs (2-4 images)"
+    )
+    image_base64_list: Optional[List[str]] = Field(
+        None, min_length=2, max_length=4, description="List of base64 encoded images (2-4 images)"
+    )
     comparison_type: str = Field("differences", description="Type of comparison: differences, changes, similarities")
     output_format: OutputFormat = Field(OutputFormat.JSON, description="Output format")
-    min_pixels: Optional[int] = Field(64 * 32 * 32, description="Minimum pixels for image processing")
-    max_pixels: Optional[int] = Field(2048 * 32 * 32, description="Maximum pixels for image processing")
+    min_pixels: int = Field(64 * 32 * 32, description="Minimum pixels for image processing")
+    max_pixels: int = Field(2048 * 32 * 32, description="Maximum pixels for image processing")
+
+    @model_validator(mode="after")
+    def check_single_image_source(self) -> "ImageComparisonRequest":
+        """Require exactly one of image_urls and image_base64_list."""
+        if (self.image_urls is None) == (self.image_base64_list is None):
+            raise ValueError("Exactly one of image_urls or image_base64_list must be provided")
+        return self
+
+
+# Maximum number of requests accepted by a single batch call
+MAX_BATCH_SIZE = 64
+
+
+class ImageDescriptionBatchRequest(BaseModel):
+    """Batch of image description requests."""
+    requests: List[ImageDescriptionRequest] = Field(
+        ..., min_length=1, max_length=MAX_BATCH_SIZE, description="Image description requests"
+    )
+
+
+class DocumentParsingBatchRequest(BaseModel):
+    """Batch of document parsing requests."""
+    requests: List[DocumentParsingRequest] = Field(
+        ..., min_length=1, max_length=MAX_BATCH_SIZE, description="Document parsing requests"
+    )
+
+
+class OCRBatchRequest(BaseModel):
+    """Batch of OCR requests."""
+    requests: List[OCRRequest] = Field(
+        ..., min_length=1, max_length=MAX_BATCH_SIZE, description="OCR requests"
+    )
 
 
 class InferenceResponse(BaseModel):
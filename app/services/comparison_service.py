@@ -1,29 +1,50 @@
 """Service for image comparison tasks."""
 import logging
+from dataclasses import dataclass
 from typing import List, Optional
+from app.core.admission import ServerOverloadedError
 from app.core.inference_engine import Qwen3VLInferenceEngine
-from app.core.utils import get_image_from_request, parse_json_response
-from app.schemas import ImageComparisonRequest, InferenceResponse
+from app.core.utils import build_image_item, get_image_from_request, parse_json_response
+from app.schemas import ImageComparisonRequest, InferenceResponse, OutputFormat
 
 logger = logging.getLogger(__name__)
 
-
+_DEFAULT_COMPARISON_PROMPT = "Compare these {num_images} images and identify all differences between them. "
+
+_COMPARISON_PROMPTS = {
+    "differences": (
+        "Compare these {num_images} images and identify all differences between them. "
+        "Focus on changes in objects, positions, colors, text, or any visual elements. "
+    ),
+    "changes": (
+        "Analyze these {num_images} images in sequence and describe what has changed from one image to the next. "
+        "Focus on temporal changes, movements, additions, or removals. "
+    ),
+    "similarities": (
+        "Compare these {num_images} images and identify common elements and similarities. "
+        "Focus on shared objects, patterns, themes, or visual characteristics. "
+    ),
+}
+
+_JSON_SUFFIX = (
+    "Provide a detailed analysis in JSON format with the following structure: "
+    '{"summary": "brief overview", "differences": [{"description": "...", "location": "...", '
+    '"images_affected": [1, 2]}], "common_elements": ["..."]}'
+)
+
+_TEXT_SUFFIX = "Provide a detailed textual analysis of the comparison."
+
+
+@dataclass(slots=True, frozen=True)
 class ImageComparisonService:
     """Service for comparing multiple images and detecting differences."""
 
-    def __init__(self, engine: Qwen3VLInferenceEngine):
-        """
-        Initialize image comparison service.
-
-        Args:
-            engine: Inference engine instance
-        """
-        self.engine = engine
+    engine: Qwen3VLInferenceEngine
 
     def _build_comparison_prompt(
         self,
         comparison_type: str,
-        output_format: str,
+        output_format: OutputFormat,
         num_images: int,
     ) -> str:
         """
@@ -37,29 +58,9 @@ class ImageComparisonService:
         Returns:
             Formatted prompt string
         """
-        if comparison_type == "differences":
-            base_prompt = f"Compare these {num_images} images and identify all differences between them. "
-            base_prompt += "Focus on changes in objects, positions, colors, text, or any visual elements. "
-        elif comparison_type == "changes":
-            base_prompt = f"Analyze these {num_images} images in sequence and describe what has changed from one image to the next. "
-            base_prompt += "Focus on temporal changes, movements, additions, or removals. "
-        elif comparison_type == "similarities":
-            base_prompt = f"Compare these {num_images} images and identify common elements and similarities. "
-            base_prompt += "Focus on shared objects, patterns, themes, or visual characteristics. "
-        else:
-            # Default to differences
-            base_prompt = f"Compare these {num_images} images and identify all differences between them. "
-
-        if output_format == "json":
-            base_prompt += (
-                "Provide a detailed analysis in JSON format with the following structure: "
-                '{"summary": "brief overview", "differences": [{"description": "...", "location": "...", '
-                '"images_affected": [1, 2]}], "common_elements": ["..."]}'
-            )
-        else:
-            base_prompt += "Provide a detailed textual analysis of the comparison."
-
-        return base_prompt
+        base_prompt = _COMPARISON_PROMPTS.get(comparison_type, _DEFAULT_COMPARISON_PROMPT)
+        suffix = _JSON_SUFFIX if output_format is OutputFormat.JSON else _TEXT_SUFFIX
+        return base_prompt.format(num_images=num_images) + suffix
 
     def _build_multi_image_message(
         self,
@@ -80,16 +81,11 @@ class ImageComparisonService:
         Returns:
             List of message dictionaries
         """
-        content = []
-
         # Add all images first
-        for i, image_input in enumerate(image_inputs):
-            content.append({
-                "type": "image",
-                "image": image_input,
-                "min_pixels": min_pixels,
-                "max_pixels": max_pixels,
-            })
+        content = [
+            build_image_item(image_input, min_pixels, max_pixels)
+            for image_input in image_inputs
+        ]
 
         # Add the text prompt at the end
         content.append({
@@ -116,40 +112,22 @@ class ImageComparisonService:
             Inference response with comparison results
         """
         try:
-            # Get image inputs
-            image_inputs = []
-
+            # Get image inputs (count and source are validated by the request schema)
             if request.image_urls:
-                if len(request.image_urls) < 2 or len(request.image_urls) > 4:
-                    return InferenceResponse(
-                        success=False,
-                        result=None,
-                        error="Number of images must be between 2 and 4",
-                    )
-                image_inputs = request.image_urls
-            elif request.image_base64_list:
-                if len(request.image_base64_list) < 2 or len(request.image_base64_list) > 4:
-                    return InferenceResponse(
-                        success=False,
-                        result=None,
-                        error="Number of images must be between 2 and 4",
-                    )
-                # Convert base64 to data URLs
-                for base64_str in request.image_base64_list:
-                    image_input = get_image_from_request(image_base64=base64_str)
-                    image_inputs.append(image_input)
+                # Downloaded concurrently and cached by URL during preprocessing
+                image_inputs = [str(url) for url in request.image_urls]
             else:
-                return InferenceResponse(
-                    success=False,
-                    result=None,
-                    error="Either image_urls or image_base64_list must be provided",
-                )
+                # Convert base64 to data URLs
+                image_inputs = [
+                    get_image_from_request(image_base64=base64_str)
+                    for base64_str in request.image_base64_list
+                ]
 
             # Build prompt
             if not request.prompt or request.prompt.strip() == "":
                 prompt = self._build_comparison_prompt(
                     comparison_type=request.comparison_type,
-                    output_format=request.output_format.value,
+                    output_format=request.output_format,
                     num_images=len(image_inputs),
                 )
             else:
@@ -159,21 +137,21 @@ class ImageComparisonService:
             messages = self._build_multi_image_message(
                 image_inputs=image_inputs,
                 prompt=prompt,
-                min_pixels=request.min_pixels or 64 * 32 * 32,
-                max_pixels=request.max_pixels or 2048 * 32 * 32,
+                min_pixels=request.min_pixels,
+                max_pixels=request.max_pixels,
             )
 
             # Generate response
-            result = self.engine.generate(
+            result = await self.engine.generate_async(
                 messages=messages,
-                max_tokens=request.max_tokens or 2048,
-                temperature=request.temperature or 0.0,
-                top_p=request.top_p or 1.0,
+                max_tokens=request.max_tokens,
+                temperature=request.temperature,
+                top_p=request.top_p,
                 seed=request.seed,
             )
 
             # Parse JSON if needed
-            if request.output_format.value == "json":
+            if request.output_format is OutputFormat.JSON:
                 result = parse_json_response(result)
 
             return InferenceResponse(
@@ -187,8 +165,10 @@ class ImageComparisonService:
                 }
             )
 
+        except ServerOverloadedError:
+            raise
         except Exception as e:
-            logger.error(f"Image comparison failed: {e}")
+            logger.error("Image comparison failed: %s", e, exc_info=True)
             return InferenceResponse(
                 success=False,
                 result=None,
@@ -1,39 +1,65 @@
 """Service for image description tasks."""
 import logging
+from dataclasses import dataclass
+from typing import AsyncIterator
+from app.core.admission import ServerOverloadedError
 from app.core.inference_engine import Qwen3VLInferenceEngine
-from app.core.utils import build_image_message, get_image_from_request
+from app.core.result_cache import result_cache, result_cache_key
+from app.core.utils import build_image_message, get_image_from_request, sse_event
 from app.schemas import ImageDescriptionRequest, InferenceResponse
 
 logger = logging.getLogger(__name__)
 
+_DESCRIPTION_PROMPTS = {
+    "basic": "Provide a brief description of the image.",
+    "detailed": "Provide a detailed description of the image, including objects, people, actions, and context.",
+    "comprehensive": (
+        "Provide a comprehensive and thorough description of the image. "
+        "Include details about: objects and their attributes, people and their actions, "
+        "spatial relationships, colors, textures, background elements, mood, and any text visible in the image."
+    ),
+}
 
+
+@dataclass(slots=True, frozen=True)
 class ImageDescriptionService:
     """Service for detailed image description."""
 
-    def __init__(self, engine: Qwen3VLInferenceEngine):
-        """
-        Initialize image description service.
-
-        Args:
-            engine: Inference engine instance
-        """
-        self.engine = engine
+    engine: Qwen3VLInferenceEngine
 
     def _build_description_prompt(self, detail_level: str, custom_prompt: str = None) -> str:
         """Build prompt based on detail level."""
         if custom_prompt:
             return custom_prompt
 
-        prompts = {
-            "basic": "Provide a brief description of the image.",
-            "detailed": "Provide a detailed description of the image, including objects, people, actions, and context.",
-            "comprehensive": (
-                "Provide a comprehensive and thorough description of the image. "
-                "Include details about: objects and their attributes, people and their actions, "
-                "spatial relationships, colors, textures, background elements, mood, and any text visible in the image."
-            ),
-        }
-        return prompts.get(detail_level, prompts["detailed"])
+        return _DESCRIPTION_PROMPTS.get(detail_level, _DESCRIPTION_PROMPTS["detailed"])
+
+    def _build_generation_kwargs(self, request: ImageDescriptionRequest) -> dict:
+        """Build engine generation arguments for an image description request."""
+        # Get image input
+        image_input = get_image_from_request(request.image_url, request.image_base64)
+
+        # Build prompt
+        prompt = self._build_description_prompt(
+            detail_level=request.detail_level,
+            custom_prompt=request.prompt if request.prompt else None
+        )
+
+        # Build messages
+        messages = build_image_message(
+            image_input=image_input,
+            prompt=prompt,
+            min_pixels=request.min_pixels,
+            max_pixels=request.max_pixels,
+        )
+
+        return dict(
+            messages=messages,
+            max_tokens=request.max_tokens,
+            temperature=request.temperature,
+            top_p=request.top_p,
+            seed=request.seed,
+        )
 
     async def perform_image_description(
         self, request: ImageDescriptionRequest
@@ -48,30 +74,11 @@ class ImageDescriptionService:
             Inference response
         """
         try:
-            # Get image input
-            image_input = get_image_from_request(request.image_url, request.image_base64)
-
-            # Build prompt
-            prompt = self._build_description_prompt(
-                detail_level=request.detail_level,
-                custom_prompt=request.prompt if request.prompt else None
-            )
-
-            # Build messages
-            messages = build_image_message(
-                image_input=image_input,
-                prompt=prompt,
-                min_pixels=request.min_pixels or 64 * 32 * 32,
-                max_pixels=request.max_pixels or 2048 * 32 * 32,
-            )
-
-            # Generate response
-            result = self.engine.generate(
-                messages=messages,
-                max_tokens=request.max_tokens or 2048,
-                temperature=request.temperature or 0.0,
-                top_p=request.top_p or 1.0,
-                seed=request.seed,
+            # Generate response (identical deterministic requests share one result)
+            generation_kwargs = self._build_generation_kwargs(request)
+            result = await result_cache.get_or_compute(
+                result_cache_key(**generation_kwargs),
+                lambda: self.engine.generate_async(**generation_kwargs),
             )
 
             return InferenceResponse(
@@ -83,10 +90,43 @@ class ImageDescriptionService:
                 }
             )
 
+        except ServerOverloadedError:
+            raise
         except Exception as e:
-            logger.error(f"Image description failed: {e}")
+            logger.error("Image description failed: %s", e, exc_info=True)
             return InferenceResponse(
                 success=False,
                 result=None,
                 error=str(e),
             )
+
+    async def stream_image_description(
+        self, request: ImageDescriptionRequest
+    ) -> AsyncIterator[bytes]:
+        """
+        Perform image description task, streaming the output as Server-Sent Events.
+
+        Generated text is sent as ``{"delta": ...}`` events, and the stream
+        always ends with a single inference response event.
+
+        Args:
+            request: Image description request
+
+        Yields:
+            Encoded SSE frames
+        """
+        try:
+            async for delta in self.engine.generate_stream(**self._build_generation_kwargs(request)):
+                yield sse_event({"delta": delta})
+            response = InferenceResponse(
+                success=True,
+                result=None,
+                metadata={
+                    "task": "image_description",
+                    "detail_level": request.detail_level,
+                }
+            )
+        except Exception as e:
+            logger.error("Image description streaming failed: %s", e, exc_info=True)
+            response = InferenceResponse(success=False, result=None, error=str(e))
+        yield sse_event(response.model_dump())
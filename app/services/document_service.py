@@ -1,34 +1,60 @@
 """Service for document parsing tasks."""
 import logging
+from dataclasses import dataclass
+from typing import AsyncIterator
+from app.core.admission import ServerOverloadedError
 from app.core.inference_engine import Qwen3VLInferenceEngine
-from app.core.utils import build_image_message, get_image_from_request
+from app.core.result_cache import result_cache, result_cache_key
+from app.core.utils import build_image_message, get_image_from_request, sse_event
 from app.schemas import DocumentParsingRequest, InferenceResponse, OutputFormat
 
 logger = logging.getLogger(__name__)
 
+_PARSING_PROMPTS = {
+    OutputFormat.HTML: "Convert the document to HTML format.",
+    OutputFormat.MARKDOWN: "Convert the document to Markdown format.",
+    OutputFormat.QWENVL_HTML: "qwenvl html",
+    OutputFormat.QWENVL_MARKDOWN: "qwenvl markdown",
+    OutputFormat.JSON: "Parse the document and output structured information in JSON format.",
+}
 
+
+@dataclass(slots=True, frozen=True)
 class DocumentParsingService:
     """Service for document parsing and extraction."""
 
-    def __init__(self, engine: Qwen3VLInferenceEngine):
-        """
-        Initialize document parsing service.
-
-        Args:
-            engine: Inference engine instance
-        """
-        self.engine = engine
+    engine: Qwen3VLInferenceEngine
 
     def _build_parsing_prompt(self, output_format: OutputFormat) -> str:
         """Build prompt based on output format."""
-        format_prompts = {
-            OutputFormat.HTML: "Convert the document to HTML format.",
-            OutputFormat.MARKDOWN: "Convert the document to Markdown format.",
-            OutputFormat.QWENVL_HTML: "qwenvl html",
-            OutputFormat.QWENVL_MARKDOWN: "qwenvl markdown",
-            OutputFormat.JSON: "Parse the document and output structured information in JSON format.",
-        }
-        return format_prompts.get(output_format, format_prompts[OutputFormat.QWENVL_HTML])
+        return _PARSING_PROMPTS.get(output_format, _PARSING_PROMPTS[OutputFormat.QWENVL_HTML])
+
+    def _build_generation_kwargs(self, request: DocumentParsingRequest) -> dict:
+        """Build engine generation arguments for a document parsing request."""
+        # Get image input
+        image_input = get_image_from_request(request.image_url, request.image_base64)
+
+        # Build prompt
+        if request.prompt:
+            prompt = request.prompt
+        else:
+            prompt = self._build_parsing_prompt(request.output_format)
+
+        # Build messages
+        messages = build_image_message(
+            image_input=image_input,
+            prompt=prompt,
+            min_pixels=request.min_pixels,
+            max_pixels=request.max_pixels,
+        )
+
+        return dict(
+            messages=messages,
+            max_tokens=request.max_tokens,
+            temperature=request.temperature,
+            top_p=request.top_p,
+            seed=request.seed,
+        )
 
     async def perform_document_parsing(
         self, request: DocumentParsingRequest
@@ -43,30 +69,11 @@ class DocumentParsingService:
             Inference response
         """
         try:
-            # Get image input
-            image_input = get_image_from_request(request.image_url, request.image_base64)
-
-            # Build prompt
-            if request.prompt:
-                prompt = request.prompt
-            else:
-                prompt = self._build_parsing_prompt(request.output_format)
-
-            # Build messages
-            messages = build_image_message(
-                image_input=image_input,
-                prompt=prompt,
-                min_pixels=request.min_pixels or 512 * 32 * 32,
-                max_pixels=request.max_pixels or 4608 * 32 * 32,
-            )
-
-            # Generate response
-            result = self.engine.generate(
-                messages=messages,
-                max_tokens=request.max_tokens or 4096,
-                temperature=request.temperature or 0.0,
-                top_p=request.top_p or 1.0,
-                seed=request.seed,
+            # Generate response (identical deterministic requests share one result)
+            generation_kwargs = self._build_generation_kwargs(request)
+            result = await result_cache.get_or_compute(
+                result_cache_key(**generation_kwargs),
+                lambda: self.engine.generate_async(**generation_kwargs),
             )
 
             return InferenceResponse(
@@ -78,10 +85,54 @@ class DocumentParsingService:
                 }
             )
 
+        except ServerOverloadedError:
+            raise
         except Exception as e:
-            logger.error(f"Document parsing failed: {e}")
+            logger.error("Document parsing failed: %s", e, exc_info=True)
             return InferenceResponse(
                 success=False,
                 result=None,
                 error=str(e),
             )
+
+    async def stream_document_parsing(
+        self, request: DocumentParsingRequest
+    ) -> AsyncIterator[bytes]:
+        """
+        Perform document parsing task, streaming the output as Server-Sent Events.
+
+        Generated text is sent as ``{"delta": ...}`` events. JSON output is
+        buffered and sent whole. The stream always ends with a single inference
+        response event.
+
+        Args:
+            request: Document parsing request
+
+        Yields:
+            Encoded SSE frames
+        """
+        if request.output_format is OutputFormat.JSON:
+            try:
+                response = await self.perform_document_parsing(request)
+            except Exception as e:
+                # Headers are already sent, so errors (e.g. overload) go into the stream
+                logger.error("Document parsing streaming failed: %s", e, exc_info=True)
+                response = InferenceResponse(success=False, result=None, error=str(e))
+            yield sse_event(response.model_dump())
+            return
+
+        try:
+            async for delta in self.engine.generate_stream(**self._build_generation_kwargs(request)):
+                yield sse_event({"delta": delta})
+            response = InferenceResponse(
+                success=True,
+                result=None,
+                metadata={
+                    "task": "document_parsing",
+                    "output_format": request.output_format.value,
+                }
+            )
+        except Exception as e:
+            logger.error("Document parsing streaming failed: %s", e, exc_info=True)
+            response = InferenceResponse(success=False, result=None, error=str(e))
+        yield sse_event(response.model_dump())
@@ -1,24 +1,20 @@
 """Service for 2D grounding tasks."""
 import logging
+from dataclasses import dataclass
 from typing import List, Optional, Dict, Any
+from app.core.admission import ServerOverloadedError
 from app.core.inference_engine import Qwen3VLInferenceEngine
 from app.core.utils import build_image_message, build_grounding_prompt, parse_json_response, get_image_from_request
-from app.schemas import Grounding2DRequest, InferenceResponse
+from app.schemas import Grounding2DRequest, InferenceResponse, OutputFormat
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass(slots=True, frozen=True)
 class GroundingService:
     """Service for 2D object grounding and detection."""
 
-    def __init__(self, engine: Qwen3VLInferenceEngine):
-        """
-        Initialize grounding service.
-
-        Args:
-            engine: Inference engine instance
-        """
-        self.engine = engine
+    engine: Qwen3VLInferenceEngine
 
     async def perform_grounding(self, request: Grounding2DRequest) -> InferenceResponse:
         """
@@ -50,21 +46,21 @@ class GroundingService:
             messages = build_image_message(
                 image_input=image_input,
                 prompt=prompt,
-                min_pixels=request.min_pixels or 64 * 32 * 32,
-                max_pixels=request.max_pixels or 2048 * 32 * 32,
+                min_pixels=request.min_pixels,
+                max_pixels=request.max_pixels,
             )
 
             # Generate response
-            result = self.engine.generate(
+            result = await self.engine.generate_async(
                 messages=messages,
-                max_tokens=request.max_tokens or 2048,
-                temperature=request.temperature or 0.0,
-                top_p=request.top_p or 1.0,
+                max_tokens=request.max_tokens,
+                temperature=request.temperature,
+                top_p=request.top_p,
                 seed=request.seed,
             )
 
             # Parse JSON if needed
-            if request.output_format.value == "json":
+            if request.output_format is OutputFormat.JSON:
                 result = parse_json_response(result)
 
             return InferenceResponse(
@@ -77,8 +73,10 @@ class GroundingService:
                 }
             )
 
+        except ServerOverloadedError:
+            raise
         except Exception as e:
-            logger.error(f"Grounding failed: {e}")
+            logger.error("Grounding failed: %s", e, exc_info=True)
             return InferenceResponse(
                 success=False,
                 result=None,
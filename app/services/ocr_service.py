@@ -1,62 +1,108 @@
 """Service for OCR tasks."""
+import functools
 import logging
+from dataclasses import dataclass
+from typing import AsyncIterator
+from app.core.admission import ServerOverloadedError
 from app.core.inference_engine import Qwen3VLInferenceEngine
-from app.core.utils import build_image_message, parse_json_response, get_image_from_request
+from app.core.result_cache import result_cache, result_cache_key
+from app.core.utils import (
+    build_image_message,
+    get_image_from_request,
+    ocr_items_to_columns,
+    parse_json_response,
+    parse_ocr_items,
+    sse_event,
+)
 from app.schemas import OCRRequest, InferenceResponse, OutputFormat
 
 logger = logging.getLogger(__name__)
 
+# For wild/natural images
+_OCR_WILD_PREFIX = (
+    "Read and extract all visible text from the image, including text on signs, labels, and any other surfaces. "
+)
+# For documents
+_OCR_DOCUMENT_PREFIX = "Read all the text in the image. "
 
+_OCR_BBOX_INSTRUCTIONS = {
+    granularity: (
+        f"Spotting all the text in the image with {granularity}-level, and output in JSON format as "
+        "[{'bbox_2d': [x1, y1, x2, y2], 'text_content': 'text'}, ...]."
+    )
+    for granularity in ("word", "line", "paragraph")
+}
+
+_OCR_JSON_INSTRUCTION = "Output the text content in JSON format."
+_OCR_TEXT_INSTRUCTION = (
+    "Please output only the text content from the image without any additional descriptions or formatting."
+)
+
+
+@dataclass(slots=True, frozen=True)
 class OCRService:
     """Service for OCR (Optical Character Recognition)."""
 
-    def __init__(self, engine: Qwen3VLInferenceEngine):
-        """
-        Initialize OCR service.
-
-        Args:
-            engine: Inference engine instance
-        """
-        self.engine = engine
+    engine: Qwen3VLInferenceEngine
 
+    @staticmethod
+    @functools.lru_cache(maxsize=32)
     def _build_ocr_prompt(
-        self,
         granularity: str,
         include_bbox: bool,
         output_format: OutputFormat,
         is_wild: bool = False,
     ) -> str:
-        """Build prompt based on OCR requirements."""
-        if is_wild:
-            # For wild/natural images
-            base_prompt = "Read and extract all visible text from the image, including text on signs, labels, and any other surfaces. "
+        """Build prompt based on OCR requirements (memoized, the prompt is a pure function of its options)."""
+        if include_bbox:
+            instruction = _OCR_BBOX_INSTRUCTIONS.get(granularity, _OCR_BBOX_INSTRUCTIONS["paragraph"])
+        elif output_format is OutputFormat.JSON:
+            instruction = _OCR_JSON_INSTRUCTION
         else:
-            # For documents
-            base_prompt = "Read all the text in the image. "
+            instruction = _OCR_TEXT_INSTRUCTION
 
-        if include_bbox:
-            if granularity == "word":
-                base_prompt += (
-                    "Spotting all the text in the image with word-level, and output in JSON format as "
-                    "[{'bbox_2d': [x1, y1, x2, y2], 'text_content': 'text'}, ...]."
-                )
-            elif granularity == "line":
-                base_prompt += (
-                    "Spotting all the text in the image with line-level, and output in JSON format as "
-                    "[{'bbox_2d': [x1, y1, x2, y2], 'text_content': 'text'}, ...]."
-                )
-            else:  # paragraph
-                base_prompt += (
-                    "Spotting all the text in the image with paragraph-level, and output in JSON format as "
-                    "[{'bbox_2d': [x1, y1, x2, y2], 'text_content': 'text'}, ...]."
-                )
+        return (_OCR_WILD_PREFIX if is_wild else _OCR_DOCUMENT_PREFIX) + instruction
+
+    def _build_generation_kwargs(self, request: OCRRequest, is_wild: bool) -> dict:
+        """Build engine generation arguments for an OCR request."""
+        # Get image input
+        image_input = get_image_from_request(request.image_url, request.image_base64)
+
+        # Build prompt
+        if request.prompt:
+            prompt = request.prompt
         else:
-            if output_format == OutputFormat.JSON:
-                base_prompt += "Output the text content in JSON format."
-            else:
-                base_prompt += "Please output only the text content from the image without any additional descriptions or formatting."
+            prompt = self._build_ocr_prompt(
+                granularity=request.granularity,
+                include_bbox=request.include_bbox,
+                output_format=request.output_format,
+                is_wild=is_wild,
+            )
 
-        return base_prompt
+        # Build messages
+        messages = build_image_message(
+            image_input=image_input,
+            prompt=prompt,
+            min_pixels=request.min_pixels,
+            max_pixels=request.max_pixels,
+        )
+
+        return dict(
+            messages=messages,
+            max_tokens=request.max_tokens,
+            temperature=request.temperature,
+            top_p=request.top_p,
+            seed=request.seed,
+        )
+
+    def _build_metadata(self, request: OCRRequest, is_wild: bool) -> dict:
+        """Build response metadata for an OCR request."""
+        return {
+            "task": "wild_ocr" if is_wild else "document_ocr",
+            "granularity": request.granularity,
+            "include_bbox": request.include_bbox,
+            "output_format": request.output_format.value,
+        }
 
     async def perform_ocr(self, request: OCRRequest, is_wild: bool = False) -> InferenceResponse:
         """
@@ -70,62 +116,77 @@ class OCRService:
             Inference response
         """
         try:
-            # Get image input
-            image_input = get_image_from_request(request.image_url, request.image_base64)
-
-            # Build prompt
-            if request.prompt:
-                prompt = request.prompt
-            else:
-                prompt = self._build_ocr_prompt(
-                    granularity=request.granularity,
-                    include_bbox=request.include_bbox,
-                    output_format=request.output_format,
-                    is_wild=is_wild,
-                )
-
-            # Build messages
-            messages = build_image_message(
-                image_input=image_input,
-                prompt=prompt,
-                min_pixels=request.min_pixels or 512 * 32 * 32,
-                max_pixels=request.max_pixels or 2048 * 32 * 32,
-            )
-
-            # Generate response
-            result = self.engine.generate(
-                messages=messages,
-                max_tokens=request.max_tokens or 4096,
-                temperature=request.temperature or 0.0,
-                top_p=request.top_p or 1.0,
-                seed=request.seed,
+            # Generate response (identical deterministic requests share one result)
+            generation_kwargs = self._build_generation_kwargs(request, is_wild)
+            result = await result_cache.get_or_compute(
+                result_cache_key(**generation_kwargs),
+                lambda: self.engine.generate_async(**generation_kwargs),
             )
 
             # Parse JSON if needed
-            if request.include_bbox or request.output_format == OutputFormat.JSON:
+            if request.include_bbox:
+                items = parse_ocr_items(result)
+                result = ocr_items_to_columns(items) if items is not None else parse_json_response(result)
+            elif request.output_format is OutputFormat.JSON:
                 result = parse_json_response(result)
 
-            task_type = "wild_ocr" if is_wild else "document_ocr"
-
             return InferenceResponse(
                 success=True,
                 result=result,
-                metadata={
-                    "task": task_type,
-                    "granularity": request.granularity,
-                    "include_bbox": request.include_bbox,
-                    "output_format": request.output_format.value,
-                }
+                metadata=self._build_metadata(request, is_wild),
             )
 
+        except ServerOverloadedError:
+            raise
         except Exception as e:
-            logger.error(f"OCR failed: {e}")
+            logger.error("OCR failed: %s", e, exc_info=True)
             return InferenceResponse(
                 success=False,
                 result=None,
                 error=str(e),
             )
 
+    async def stream_ocr(self, request: OCRRequest, is_wild: bool = False) -> AsyncIterator[bytes]:
+        """
+        Perform OCR task, streaming the output as Server-Sent Events.
+
+        Plain text is sent as ``{"delta": ...}`` events while it is generated.
+        Structured output (JSON or bounding boxes) is buffered and parsed first,
+        so clients never see partial JSON. The stream always ends with a single
+        inference response event.
+
+        Args:
+            request: OCR request
+            is_wild: Whether this is wild/natural image OCR
+
+        Yields:
+            Encoded SSE frames
+        """
+        if request.include_bbox or request.output_format is OutputFormat.JSON:
+            try:
+                response = await self.perform_ocr(request, is_wild)
+            except Exception as e:
+                # Headers are already sent, so errors (e.g. overload) go into the stream
+                logger.error("OCR streaming failed: %s", e, exc_info=True)
+                response = InferenceResponse(success=False, result=None, error=str(e))
+            yield sse_event(response.model_dump())
+            return
+
+        try:
+            async for delta in self.engine.generate_stream(
+                **self._build_generation_kwargs(request, is_wild)
+            ):
+                yield sse_event({"delta": delta})
+            response = InferenceResponse(
+                success=True,
+                result=None,
+                metadata=self._build_metadata(request, is_wild),
+            )
+        except Exception as e:
+            logger.error("OCR streaming failed: %s", e, exc_info=True)
+            response = InferenceResponse(success=False, result=None, error=str(e))
+        yield sse_event(response.model_dump())
+
     async def perform_document_ocr(self, request: OCRRequest) -> InferenceResponse:
         """Perform document OCR."""
         return await self.perform_ocr(request, is_wild=False)
@@ -1,23 +1,19 @@
 """Service for spatial understanding tasks."""
 import logging
+from dataclasses import dataclass
+from app.core.admission import ServerOverloadedError
 from app.core.inference_engine import Qwen3VLInferenceEngine
 from app.core.utils import build_image_message, parse_json_response, get_image_from_request
-from app.schemas import SpatialUnderstandingRequest, InferenceResponse
+from app.schemas import SpatialUnderstandingRequest, InferenceResponse, OutputFormat
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass(slots=True, frozen=True)
 class SpatialUnderstandingService:
     """Service for spatial understanding and reasoning."""
 
-    def __init__(self, engine: Qwen3VLInferenceEngine):
-        """
-        Initialize spatial understanding service.
-
-        Args:
-            engine: Inference engine instance
-        """
-        self.engine = engine
+    engine: Qwen3VLInferenceEngine
 
     async def perform_spatial_understanding(
         self, request: SpatialUnderstandingRequest
@@ -42,21 +38,21 @@ class SpatialUnderstandingService:
             messages = build_image_message(
                 image_input=image_input,
                 prompt=prompt,
-                min_pixels=request.min_pixels or 64 * 32 * 32,
-                max_pixels=request.max_pixels or 2048 * 32 * 32,
+                min_pixels=request.min_pixels,
+                max_pixels=request.max_pixels,
             )
 
             # Generate response
-            result = self.engine.generate(
+            result = await self.engine.generate_async(
                 messages=messages,
-                max_tokens=request.max_tokens or 2048,
-                temperature=request.temperature or 0.0,
-                top_p=request.top_p or 1.0,
+                max_tokens=request.max_tokens,
+                temperature=request.temperature,
+                top_p=request.top_p,
                 seed=request.seed,
             )
 
             # Parse JSON if needed
-            if request.output_format.value == "json":
+            if request.output_format is OutputFormat.JSON:
                 result = parse_json_response(result)
 
             return InferenceResponse(
@@ -69,8 +65,10 @@ class SpatialUnderstandingService:
                 }
             )
 
+        except ServerOverloadedError:
+            raise
         except Exception as e:
-            logger.error(f"Spatial understanding failed: {e}")
+            logger.error("Spatial understanding failed: %s", e, exc_info=True)
             return InferenceResponse(
                 success=False,
                 result=None,
@@ -1,37 +1,55 @@
 """Service for video understanding tasks."""
+import asyncio
 import logging
+from dataclasses import dataclass
 from typing import Optional, Union, List
+from PIL import Image
+from app.core.admission import ServerOverloadedError
 from app.core.inference_engine import Qwen3VLInferenceEngine
-from app.core.utils import build_video_message, get_video_from_request, get_frames_from_request
+from app.core.utils import (
+    build_video_message,
+    decode_image_bytes,
+    get_video_from_request,
+    get_frames_from_request,
+    prefetch_frames,
+    sample_frame_indices,
+)
 from app.schemas import VideoUnderstandingRequest, InferenceResponse
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass(slots=True, frozen=True)
 class VideoUnderstandingService:
     """Service for video understanding and analysis."""
 
-    def __init__(self, engine: Qwen3VLInferenceEngine):
-        """
-        Initialize video understanding service.
+    engine: Qwen3VLInferenceEngine
 
-        Args:
-            engine: Inference engine instance
-        """
-        self.engine = engine
-
-    def _get_video_input(self, request: VideoUnderstandingRequest) -> Union[str, List[str]]:
-        """Get video input from request."""
-        # Priority: video_url -> video_base64 -> frame_urls -> frame_base64_list
-        if request.video_url or request.video_base64:
+    def _get_video_input(
+        self, request: VideoUnderstandingRequest, video_path: Optional[str] = None
+    ) -> Union[str, List[str], List[Image.Image]]:
+        """Get video input from request, or from a server-side file if given."""
+        # Priority: video_path -> video_url -> video_base64 -> frame_urls -> frame_base64_list
+        if video_path or request.video_url or request.video_base64:
             return get_video_from_request(
                 video_url=request.video_url,
-                video_base64=request.video_base64
+                video_base64=request.video_base64,
+                video_path=video_path,
+            )
+        elif request.frame_urls:
+            # Fetch the sampled frames concurrently instead of one by one during preprocessing
+            indices = sample_frame_indices(len(request.frame_urls), request.max_frames)
+            frames = prefetch_frames([request.frame_urls[i] for i in indices])
+            # Per-frame pixel budget used downstream (temporal patches pair frames)
+            frame_pixels = max(
+                request.min_pixels,
+                request.total_pixels * 2 // len(frames),
             )
-        elif request.frame_urls or request.frame_base64_list:
+            return [decode_image_bytes(data, max_pixels=frame_pixels) for data in frames]
+        elif request.frame_base64_list:
+            indices = sample_frame_indices(len(request.frame_base64_list), request.max_frames)
             return get_frames_from_request(
-                frame_urls=request.frame_urls,
-                frame_base64_list=request.frame_base64_list
+                frame_base64_list=[request.frame_base64_list[i] for i in indices]
             )
         else:
             raise ValueError(
@@ -39,20 +57,22 @@ class VideoUnderstandingService:
             )
 
     async def perform_video_understanding(
-        self, request: VideoUnderstandingRequest
+        self, request: VideoUnderstandingRequest, video_path: Optional[str] = None
     ) -> InferenceResponse:
         """
         Perform video understanding task.
 
         Args:
             request: Video understanding request
+            video_path: Server-side video file (e.g. a saved upload); never taken
+                from client input, since it is opened as-is
 
         Returns:
             Inference response
         """
         try:
             # Get video input
-            video_input = self._get_video_input(request)
+            video_input = await asyncio.to_thread(self._get_video_input, request, video_path)
 
             # Use prompt from request
             prompt = request.prompt
@@ -61,24 +81,26 @@ class VideoUnderstandingService:
             messages = build_video_message(
                 video_input=video_input,
                 prompt=prompt,
-                total_pixels=request.total_pixels or 20480 * 32 * 32,
-                min_pixels=request.min_pixels or 64 * 32 * 32,
-                max_frames=request.max_frames or 2048,
-                sample_fps=request.sample_fps or 2.0,
+                total_pixels=request.total_pixels,
+                min_pixels=request.min_pixels,
+                max_frames=request.max_frames,
+                sample_fps=request.sample_fps,
             )
 
             # Generate response
-            result = self.engine.generate(
+            result = await self.engine.generate_async(
                 messages=messages,
-                max_tokens=request.max_tokens or 2048,
-                temperature=request.temperature or 0.0,
-                top_p=request.top_p or 1.0,
+                max_tokens=request.max_tokens,
+                temperature=request.temperature,
+                top_p=request.top_p,
                 seed=request.seed,
             )
 
             # Determine video type for metadata
             video_type = "unknown"
-            if request.video_url:
+            if video_path:
+                video_type = "path"
+            elif request.video_url:
                 video_type = "url"
             elif request.video_base64:
                 video_type = "base64"
@@ -96,8 +118,10 @@ class VideoUnderstandingService:
                 }
             )
 
+        except ServerOverloadedError:
+            raise
         except Exception as e:
-            logger.error(f"Video understanding failed: {e}")
+            logger.error("Video understanding failed: %s", e, exc_info=True)
             return InferenceResponse(
                 success=False,
                 result=None,
@@ -1,6 +1,28 @@
 """Example of using Image Comparison endpoint."""
+import os
+import orjson
+import pybase64
 import requests
-import json
+from requests.adapters import HTTPAdapter
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+def _create_session(pool_maxsize: int = 16) -> requests.Session:
+    """Create a session whose connections are kept alive and reused across examples."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_maxsize, pool_maxsize=pool_maxsize)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+SESSION = _create_session()
+
+
+def _dumps(obj) -> str:
+    """Pretty-print a JSON-compatible object."""
+    return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode()
 
 
 def compare_images_url():
@@ -19,9 +41,9 @@ def compare_images_url():
         "prompt": ""
     }
 
-    response = requests.post(url, json=data)
-    result = response.json()
-    print(json.dumps(result, indent=2, ensure_ascii=False))
+    response = SESSION.post(url, data=orjson.dumps(data), headers=JSON_HEADERS)
+    result = orjson.loads(response.content)
+    print(_dumps(result))
 
     # Example 2: Analyze changes across 3 images (temporal sequence)
     print("\n=== Example 2: Comparing 3 Images (Changes) ===")
@@ -36,9 +58,9 @@ def compare_images_url():
         "prompt": ""
     }
 
-    response = requests.post(url, json=data)
-    result = response.json()
-    print(json.dumps(result, indent=2, ensure_ascii=False))
+    response = SESSION.post(url, data=orjson.dumps(data), headers=JSON_HEADERS)
+    result = orjson.loads(response.content)
+    print(_dumps(result))
 
     # Example 3: Find similarities across 4 images
     print("\n=== Example 3: Comparing 4 Images (Similarities) ===")
@@ -54,42 +76,61 @@ def compare_images_url():
         "prompt": ""
     }
 
-    response = requests.post(url, json=data)
-    result = response.json()
-    print(json.dumps(result, indent=2, ensure_ascii=False))
+    response = SESSION.post(url, data=orjson.dumps(data), headers=JSON_HEADERS)
+    result = orjson.loads(response.content)
+    print(_dumps(result))
+
+
+# Multiple of 3 bytes, so each chunk encodes to base64 without padding
+ENCODE_CHUNK_SIZE = 57 * 1024
+
+
+def iter_base64_file(path):
+    """Yield the base64 encoding of a file chunk by chunk."""
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(ENCODE_CHUNK_SIZE), b""):
+            yield pybase64.b64encode(chunk)
+
+
+def iter_comparison_body(image_paths, **fields):
+    """
+    Yield a JSON comparison request with base64 images, without holding them in memory.
+
+    Only one file chunk and its encoding are alive at a time, instead of every
+    file plus its base64 string plus the serialized JSON body.
+    """
+    yield orjson.dumps(fields)[:-1] + b', "image_base64_list": ["'
+    for i, path in enumerate(image_paths):
+        if i:
+            yield b'", "'
+        yield from iter_base64_file(path)
+    yield b'"]}'
 
 
 def compare_images_base64():
     """Example: Compare images using base64."""
-    import base64
-
     url = "http://localhost:8000/api/v1/image/comparison"
 
-    # Read and encode images
-    image_paths = ["image1.jpg", "image2.jpg"]
-    image_base64_list = []
-
-    for path in image_paths:
-        try:
-            with open(path, "rb") as f:
-                image_data = base64.b64encode(f.read()).decode()
-                image_base64_list.append(image_data)
-        except FileNotFoundError:
+    # Images are encoded while the request body is being sent
+    image_paths = []
+    for path in ["image1.jpg", "image2.jpg"]:
+        if os.path.exists(path):
+            image_paths.append(path)
+        else:
             print(f"Warning: {path} not found, skipping...")
-            continue
 
-    if len(image_base64_list) >= 2:
+    if len(image_paths) >= 2:
         print("=== Comparing Images from Base64 ===")
-        data = {
-            "image_base64_list": image_base64_list,
-            "comparison_type": "differences",
-            "output_format": "json",
-            "prompt": ""
-        }
-
-        response = requests.post(url, json=data)
-        result = response.json()
-        print(json.dumps(result, indent=2, ensure_ascii=False))
+        body = iter_comparison_body(
+            image_paths,
+            comparison_type="differences",
+            output_format="json",
+            prompt="",
+        )
+
+        response = SESSION.post(url, data=body, headers=JSON_HEADERS)
+        result = orjson.loads(response.content)
+        print(_dumps(result))
     else:
         print("Not enough images found for comparison")
 
@@ -109,9 +150,9 @@ def compare_with_custom_prompt():
         "prompt": "Compare these two images of the same room and identify all furniture and decoration changes. Pay special attention to color changes, new or removed items, and repositioned objects."
     }
 
-    response = requests.post(url, json=data)
-    result = response.json()
-    print(json.dumps(result, indent=2, ensure_ascii=False))
+    response = SESSION.post(url, data=orjson.dumps(data), headers=JSON_HEADERS)
+    result = orjson.loads(response.content)
+    print(_dumps(result))
 
 
 def compare_with_parameters():
@@ -135,9 +176,9 @@ def compare_with_parameters():
         "max_pixels": 1048576
     }
 
-    response = requests.post(url, json=data)
-    result = response.json()
-    print(json.dumps(result, indent=2, ensure_ascii=False))
+    response = SESSION.post(url, data=orjson.dumps(data), headers=JSON_HEADERS)
+    result = orjson.loads(response.content)
+    print(_dumps(result))
 
 
 def main():
@@ -1,26 +1,51 @@
 """Example client for Qwen3-VL Inference Server."""
+import asyncio
+import os
+import httpx
+import orjson
 import requests
-import json
+from requests.adapters import HTTPAdapter
 from typing import Dict, Any
 
+JSON_HEADERS = {"Content-Type": "application/json"}
 
-class Qwen3VLClient:
-    """Client for Qwen3-VL Inference Server."""
 
-    def __init__(self, base_url: str = "http://localhost:8000"):
-        """
-        Initialize client.
+def _dumps(obj) -> str:
+    """Pretty-print a JSON-compatible object."""
+    return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode()
+
+
+def _payload(fields: Dict[str, Any], overrides: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build a request body in one pass, leaving out unset (None) values.
+
+    Args:
+        fields: Named endpoint parameters
+        overrides: Extra parameters, which take precedence over ``fields``
+
+    Returns:
+        Request body
+    """
+    return {
+        key: value
+        for source in (fields, overrides)
+        for key, value in source.items()
+        if value is not None
+    }
 
-        Args:
-            base_url: Base URL of the inference server
-        """
-        self.base_url = base_url.rstrip("/")
+
+class _Qwen3VLClientBase:
+    """
+    Request building shared by the sync and async clients.
+
+    Subclasses implement the transport (``_get``, ``_post``, ``_post_file``);
+    endpoint methods return whatever it returns, so on the async client they
+    return coroutines.
+    """
 
     def health_check(self) -> Dict[str, Any]:
         """Check server health."""
-        response = requests.get(f"{self.base_url}/api/health")
-        response.raise_for_status()
-        return response.json()
+        return self._get("/api/health")
 
     def grounding_2d(
         self,
@@ -45,20 +70,15 @@ class Qwen3VLClient:
         Returns:
             Response dictionary
         """
-        data = {
+        data = _payload({
             "image_url": image_url,
             "image_base64": image_base64,
             "categories": categories,
             "prompt": prompt or "",
             "include_attributes": include_attributes,
-            **kwargs
-        }
-        # Remove None values
-        data = {k: v for k, v in data.items() if v is not None}
+        }, kwargs)
 
-        response = requests.post(f"{self.base_url}/api/v1/grounding/2d", json=data)
-        response.raise_for_status()
-        return response.json()
+        return self._post("/api/v1/grounding/2d", data)
 
     def spatial_understanding(
         self,
@@ -79,18 +99,14 @@ class Qwen3VLClient:
         Returns:
             Response dictionary
         """
-        data = {
+        data = _payload({
             "image_url": image_url,
             "image_base64": image_base64,
             "query": query,
             "prompt": query,  # Use query as prompt
-            **kwargs
-        }
-        data = {k: v for k, v in data.items() if v is not None}
+        }, kwargs)
 
-        response = requests.post(f"{self.base_url}/api/v1/spatial/understanding", json=data)
-        response.raise_for_status()
-        return response.json()
+        return self._post("/api/v1/spatial/understanding", data)
 
     def video_understanding(
         self,
@@ -115,19 +131,15 @@ class Qwen3VLClient:
         Returns:
             Response dictionary
         """
-        data = {
+        data = _payload({
             "video_url": video_url,
             "video_base64": video_base64,
             "frame_urls": frame_urls,
             "frame_base64_list": frame_base64_list,
             "prompt": prompt or "",
-            **kwargs
-        }
-        data = {k: v for k, v in data.items() if v is not None}
+        }, kwargs)
 
-        response = requests.post(f"{self.base_url}/api/v1/video/understanding", json=data)
-        response.raise_for_status()
-        return response.json()
+        return self._post("/api/v1/video/understanding", data)
 
     def video_understanding_upload(
         self,
@@ -150,24 +162,13 @@ class Qwen3VLClient:
         Returns:
             Response dictionary
         """
-        import os
-
-        with open(video_path, "rb") as f:
-            files = {"file": (os.path.basename(video_path), f, "video/mp4")}
-            data = {
-                "prompt": prompt,
-                "max_frames": max_frames,
-                "sample_fps": sample_fps,
-                **kwargs
-            }
-
-            response = requests.post(
-                f"{self.base_url}/api/v1/video/understanding/upload",
-                files=files,
-                data=data
-            )
-            response.raise_for_status()
-            return response.json()
+        data = {
+            "prompt": prompt,
+            "max_frames": max_frames,
+            "sample_fps": sample_fps,
+            **kwargs
+        }
+        return self._post_file("/api/v1/video/understanding/upload", video_path, "video/mp4", data)
 
     def image_description(
         self,
@@ -188,18 +189,14 @@ class Qwen3VLClient:
         Returns:
             Response dictionary
         """
-        data = {
+        data = _payload({
             "image_url": image_url,
             "image_base64": image_base64,
             "detail_level": detail_level,
             "prompt": "",
-            **kwargs
-        }
-        data = {k: v for k, v in data.items() if v is not None}
+        }, kwargs)
 
-        response = requests.post(f"{self.base_url}/api/v1/image/description", json=data)
-        response.raise_for_status()
-        return response.json()
+        return self._post("/api/v1/image/description", data)
 
     def document_parsing(
         self,
@@ -220,18 +217,14 @@ class Qwen3VLClient:
         Returns:
             Response dictionary
         """
-        data = {
+        data = _payload({
             "image_url": image_url,
             "image_base64": image_base64,
             "output_format": output_format,
             "prompt": "",
-            **kwargs
-        }
-        data = {k: v for k, v in data.items() if v is not None}
+        }, kwargs)
 
-        response = requests.post(f"{self.base_url}/api/v1/document/parsing", json=data)
-        response.raise_for_status()
-        return response.json()
+        return self._post("/api/v1/document/parsing", data)
 
     def document_ocr(
         self,
@@ -254,20 +247,16 @@ class Qwen3VLClient:
         Returns:
             Response dictionary
         """
-        data = {
+        data = _payload({
             "image_url": image_url,
             "image_base64": image_base64,
             "granularity": granularity,
             "include_bbox": include_bbox,
             "prompt": "",
             "output_format": "text",
-            **kwargs
-        }
-        data = {k: v for k, v in data.items() if v is not None}
+        }, kwargs)
 
-        response = requests.post(f"{self.base_url}/api/v1/ocr/document", json=data)
-        response.raise_for_status()
-        return response.json()
+        return self._post("/api/v1/ocr/document", data)
 
     def wild_ocr(
         self,
@@ -288,20 +277,16 @@ class Qwen3VLClient:
         Returns:
             Response dictionary
         """
-        data = {
+        data = _payload({
             "image_url": image_url,
             "image_base64": image_base64,
             "include_bbox": include_bbox,
             "prompt": "",
             "output_format": "text",
             "granularity": "line",
-            **kwargs
-        }
-        data = {k: v for k, v in data.items() if v is not None}
+        }, kwargs)
 
-        response = requests.post(f"{self.base_url}/api/v1/ocr/wild", json=data)
-        response.raise_for_status()
-        return response.json()
+        return self._post("/api/v1/ocr/wild", data)
 
     def image_comparison(
         self,
@@ -326,19 +311,107 @@ class Qwen3VLClient:
         Returns:
             Response dictionary
         """
-        data = {
+        data = _payload({
             "image_urls": image_urls,
             "image_base64_list": image_base64_list,
             "comparison_type": comparison_type,
             "output_format": output_format,
             "prompt": prompt or "",
-            **kwargs
-        }
-        data = {k: v for k, v in data.items() if v is not None}
+        }, kwargs)
+
+        return self._post("/api/v1/image/comparison", data)
+
+
+class Qwen3VLClient(_Qwen3VLClientBase):
+    """Client for Qwen3-VL Inference Server."""
+
+    def __init__(self, base_url: str = "http://localhost:8000", pool_maxsize: int = 16):
+        """
+        Initialize client.
+
+        Args:
+            base_url: Base URL of the inference server
+            pool_maxsize: Maximum number of pooled connections (for use from several threads)
+        """
+        self.base_url = base_url.rstrip("/")
+        # One session keeps connections alive between calls
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_maxsize, pool_maxsize=pool_maxsize)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
+    def close(self):
+        """Close pooled connections."""
+        self._session.close()
+
+    def _get(self, path: str) -> Dict[str, Any]:
+        response = self._session.get(f"{self.base_url}{path}")
+        response.raise_for_status()
+        return orjson.loads(response.content)
+
+    def _post(self, path: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        response = self._session.post(f"{self.base_url}{path}", data=orjson.dumps(data), headers=JSON_HEADERS)
+        response.raise_for_status()
+        return orjson.loads(response.content)
+
+    def _post_file(self, path: str, file_path: str, content_type: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        with open(file_path, "rb") as f:
+            files = {"file": (os.path.basename(file_path), f, content_type)}
+            response = self._session.post(f"{self.base_url}{path}", files=files, data=data)
+        response.raise_for_status()
+        return orjson.loads(response.content)
+
+
+class AsyncQwen3VLClient(_Qwen3VLClientBase):
+    """
+    Asynchronous client for Qwen3-VL Inference Server.
 
-        response = requests.post(f"{self.base_url}/api/v1/image/comparison", json=data)
+    Requests reuse a pool of keep-alive HTTP/1.1 connections, so many calls can
+    be awaited concurrently (e.g. with ``asyncio.gather``) without a new
+    connection per request.
+    """
+
+    def __init__(self, base_url: str = "http://localhost:8000", max_connections: int = 32):
+        """
+        Initialize client.
+
+        Args:
+            base_url: Base URL of the inference server
+            max_connections: Maximum number of keep-alive connections
+        """
+        self.base_url = base_url.rstrip("/")
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            limits=httpx.Limits(max_keepalive_connections=max_connections),
+            timeout=None,
+        )
+
+    async def __aenter__(self) -> "AsyncQwen3VLClient":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def aclose(self):
+        """Close pooled connections."""
+        await self._client.aclose()
+
+    async def _get(self, path: str) -> Dict[str, Any]:
+        response = await self._client.get(path)
+        response.raise_for_status()
+        return orjson.loads(response.content)
+
+    async def _post(self, path: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        response = await self._client.post(path, content=orjson.dumps(data), headers=JSON_HEADERS)
+        response.raise_for_status()
+        return orjson.loads(response.content)
+
+    async def _post_file(self, path: str, file_path: str, content_type: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        with open(file_path, "rb") as f:
+            files = {"file": (os.path.basename(file_path), f, content_type)}
+            response = await self._client.post(path, files=files, data=data)
         response.raise_for_status()
-        return response.json()
+        return orjson.loads(response.content)
 
 
 def main():
@@ -348,7 +421,7 @@ def main():
     # Check health
     print("=== Health Check ===")
     health = client.health_check()
-    print(json.dumps(health, indent=2, ensure_ascii=False))
+    print(_dumps(health))
 
     # Example 1: 2D Grounding
     print("\n=== 2D Grounding ===")
@@ -357,7 +430,7 @@ def main():
         categories=["person", "car"],
         include_attributes=True
     )
-    print(json.dumps(result, indent=2, ensure_ascii=False))
+    print(_dumps(result))
 
     # Example 2: Image Description
     print("\n=== Image Description ===")
@@ -365,7 +438,7 @@ def main():
         image_url="https://example.com/image.jpg",
         detail_level="comprehensive"
     )
-    print(json.dumps(result, indent=2, ensure_ascii=False))
+    print(_dumps(result))
 
     # Example 3: Document OCR
     print("\n=== Document OCR ===")
@@ -374,7 +447,7 @@ def main():
         include_bbox=True,
         granularity="line"
     )
-    print(json.dumps(result, indent=2, ensure_ascii=False))
+    print(_dumps(result))
 
     # Example 4: Image Comparison
     print("\n=== Image Comparison ===")
@@ -387,8 +460,25 @@ def main():
         comparison_type="differences",
         output_format="json"
     )
-    print(json.dumps(result, indent=2, ensure_ascii=False))
+    print(_dumps(result))
+
+
+async def async_main():
+    """Example of concurrent requests with the async client."""
+    async with AsyncQwen3VLClient("http://localhost:8000") as client:
+        print("\n=== Concurrent Image Descriptions ===")
+        results = await asyncio.gather(*(
+            client.image_description(image_url=url, detail_level="basic")
+            for url in [
+                "https://example.com/image1.jpg",
+                "https://example.com/image2.jpg",
+                "https://example.com/image3.jpg",
+            ]
+        ))
+        for result in results:
+            print(_dumps(result))
 
 
 if __name__ == "__main__":
     main()
+    asyncio.run(async_main())
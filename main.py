@@ -1,12 +1,17 @@
 """Entry point for Qwen3-VL Inference Server."""
+import multiprocessing
 import uvicorn
 from app.config import settings
 
 if __name__ == "__main__":
+    multiprocessing.set_start_method("spawn", force=True)
     uvicorn.run(
         "app.main:app",
         host=settings.host,
         port=settings.port,
         reload=settings.debug,
         log_level="info",
+        # Single worker: the engine owns the GPU and batches requests internally.
+        # loop/http stay "auto": uvloop and httptools are used where available
+        # (not on Windows)
     )
@@ -0,0 +1,116 @@
+"""Client disconnects cancel in-flight generation through the full application."""
+import asyncio
+import time
+import unittest
+from unittest import mock
+
+import orjson
+
+from app.api import routes
+from app.core.inference_engine import Qwen3VLInferenceEngine
+from app.main import app
+
+
+class FakeAsyncLLMEngine:
+    """Stands in for vLLM's AsyncLLMEngine: generation never finishes on its own."""
+
+    def __init__(self):
+        self.started = asyncio.Event()
+        self.aborted = asyncio.Event()
+        self.request_ids = []
+        self.aborted_ids = []
+
+    async def generate(self, inputs, sampling_params, request_id):
+        self.request_ids.append(request_id)
+        self.started.set()
+        await asyncio.sleep(60)
+        yield
+
+    async def abort(self, request_id):
+        self.aborted_ids.append(request_id)
+        self.aborted.set()
+
+
+def make_engine(model: FakeAsyncLLMEngine) -> Qwen3VLInferenceEngine:
+    """Build an engine around a fake vLLM engine, skipping model loading."""
+    engine = Qwen3VLInferenceEngine.__new__(Qwen3VLInferenceEngine)
+    engine.model = model
+    engine.processor = object()
+    engine.admission = None
+    return engine
+
+
+class DisconnectTest(unittest.IsolatedAsyncioTestCase):
+    """Drive ``app.main.app`` with a raw ASGI client that hangs up mid-request."""
+
+    async def asyncSetUp(self):
+        self.model = FakeAsyncLLMEngine()
+        routes.set_engine(make_engine(self.model))
+        patches = [
+            mock.patch.object(Qwen3VLInferenceEngine, "prepare_image_inputs", return_value={}),
+            mock.patch.object(Qwen3VLInferenceEngine, "_make_sampling_params", return_value=None),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    async def asyncTearDown(self):
+        routes.set_engine(None)
+
+    async def request(self, path: str, payload: dict, disconnect_after: float) -> list:
+        """Send a JSON request, then report a disconnect ``disconnect_after`` seconds later."""
+        body = orjson.dumps(payload)
+        messages = [{"type": "http.request", "body": body, "more_body": False}]
+        disconnect_at = time.monotonic() + disconnect_after
+        sent = []
+
+        async def receive():
+            if messages:
+                return messages.pop(0)
+            # Like uvicorn: after the disconnect, answer without suspending
+            delay = disconnect_at - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "POST",
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": b"",
+            "root_path": "",
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+            ],
+            "client": ("testclient", 50000),
+            "server": ("testserver", 80),
+            "state": {},
+        }
+        await asyncio.wait_for(app(scope, receive, send), timeout=5)
+        return sent
+
+    async def test_disconnect_cancels_generation_and_aborts_request(self):
+        started = time.monotonic()
+        sent = await self.request(
+            "/api/v1/image/description",
+            {"prompt": "Describe", "image_url": "http://example.com/a.jpg", "seed": 1},
+            disconnect_after=0.3,
+        )
+
+        self.assertTrue(self.model.started.is_set())
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertEqual(sent[0]["status"], routes.CLIENT_CLOSED_REQUEST)
+        await asyncio.wait_for(self.model.aborted.wait(), timeout=1)
+        self.assertEqual(self.model.aborted_ids, self.model.request_ids)
+
+
+if __name__ == "__main__":
+    unittest.main()